@@ -1,14 +1,131 @@
 #!/usr/bin/env python3
+import errno
+import itertools
 import os
+import re
 import sys
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from pathlib import Path
 import threading
 import queue
+import traceback
 import time
 import signal
 import atexit
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+# Maximum number of tree rows (or other queued worker messages) handled
+# per UI tick; workers post rows in batches of this size
+QUEUE_BATCH_SIZE = 200
+
+# Queued messages about a tree load; each carries (load generation, data)
+# so process_queue can drop those left over from an earlier load
+LOAD_MESSAGES = frozenset({'add_items', 'loading_complete', 'loading_cancelled',
+                           'loading_error', 'file_count'})
+
+# File extension to emoji mapping
+ICON_MAP = {
+    '.py': '🐍', '.js': '📜', '.jsx': '⚛️', '.ts': '📘', '.tsx': '⚛️',
+    '.html': '🌐', '.css': '🎨', '.scss': '🎨', '.sass': '🎨',
+    '.java': '☕', '.cpp': '🔧', '.c': '🔧', '.h': '📋',
+    '.json': '📦', '.xml': '📄', '.yml': '⚙️', '.yaml': '⚙️',
+    '.md': '📝', '.txt': '📃', '.csv': '📊', '.sql': '🗄️',
+    '.jpg': '🖼️', '.jpeg': '🖼️', '.png': '🖼️', '.gif': '🖼️',
+    '.pdf': '📕', '.doc': '📘', '.docx': '📘', '.xls': '📗', '.xlsx': '📗',
+    '.zip': '🗜️', '.tar': '🗜️', '.gz': '🗜️', '.7z': '🗜️',
+    '.exe': '⚙️', '.dll': '🔧', '.so': '🔧', '.dylib': '🔧',
+    '.sh': '🐚', '.bash': '🐚', '.zsh': '🐚',
+    '.php': '🐘', '.rb': '💎', '.go': '🐹', '.rs': '🦀',
+    '.swift': '🐦', '.kt': '🅺', '.dart': '🎯',
+}
+DEFAULT_FILE_ICON = '📄'
+
+# Size units and divisors indexed by (bit_length - 1) // 10
+SIZE_UNITS = (("B", 1), ("KB", 1024), ("MB", 1024 * 1024), ("GB", 1024 * 1024 * 1024))
+
+# Decorative rules used in the compiled output
+RULE = "=" * 70
+FILE_RULE = "// " + "=" * 67
+ERROR_RULE = "// " + "!" * 67
+TITLE_INDENT = " " * 10
+FILE_GAP = b"\n\n"  # Written after every file's contents
+
+# Chunk size for streaming file contents into the compiled output
+COPY_CHUNK_SIZE = 1 << 20
+
+# Files at least this large are streamed into the output; smaller ones
+# are read whole and queued for a gathered write
+LARGE_FILE_SIZE = 1 << 20
+
+# Queued output is flushed with one writev() once it reaches either limit
+# (1024 is IOV_MAX on Linux and macOS)
+WRITEV_MAX_BYTES = 4 << 20
+WRITEV_MAX_ENTRIES = 1024
+USE_WRITEV = hasattr(os, 'writev')
+
+# The output is written to a uniquely named temp file with this suffix next
+# to its destination and renamed over it once complete, so a failed run never
+# leaves a partial file or touches anything else
+TEMP_SUFFIX = ".tmp"
+
+# Permissions the output gets, as for any new file; the temp file it is
+# written under starts out owner-only
+_umask = os.umask(0)
+os.umask(_umask)
+OUTPUT_FILE_MODE = 0o666 & ~_umask
+
+# How many files ahead of the writer are read in the background, and by
+# how many threads (reads release the GIL)
+READ_AHEAD_FILES = 32
+READ_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+# Compile progress is reported about this many times per run
+PROGRESS_UPDATES = 200
+
+# In-kernel copies to try in order, each called as
+# (in_fd, out_fd, offset, count) -> bytes copied. copy_file_range() skips
+# the page-cache round trip (and can share extents on CoW filesystems);
+# sendfile() also works across filesystems. Both can target a regular
+# file only on Linux.
+KERNEL_COPIES = []
+if sys.platform.startswith('linux'):
+    if hasattr(os, 'copy_file_range'):
+        KERNEL_COPIES.append(
+            lambda in_fd, out_fd, offset, count: os.copy_file_range(in_fd, out_fd, count, offset))
+    if hasattr(os, 'sendfile'):
+        KERNEL_COPIES.append(
+            lambda in_fd, out_fd, offset, count: os.sendfile(out_fd, in_fd, offset, count))
+
+# Errors meaning a kernel copy can't be used between two files
+KERNEL_COPY_UNSUPPORTED = frozenset((errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                                     errno.EOPNOTSUPP, errno.EBADF))
+
+# Page-cache hints (None where posix_fadvise() is unavailable): large
+# sources are read front to back once, and the finished output is not
+# read back by us
+FADVISE_SEQUENTIAL = getattr(os, 'POSIX_FADV_SEQUENTIAL', None)
+FADVISE_DONTNEED = getattr(os, 'POSIX_FADV_DONTNEED', None)
+
+# Names skipped along with hidden ('.'-prefixed) entries: caches and
+# dependency trees that would swamp the listing
+EXCLUDED_NAMES = frozenset({'__pycache__', 'node_modules', 'venv', '.git', '.venv',
+                            '.mypy_cache', '.pytest_cache'})
+
+# Suffix for the placeholder child that marks a folder as not yet loaded
+PLACEHOLDER_SUFFIX = ":placeholder"
+
+# Initial tree tags keyed by (odd row, is directory)
+ROW_TAGS = {
+    (False, False): ("unchecked", "evenrow", "file"),
+    (True, False): ("unchecked", "oddrow", "file"),
+    (False, True): ("unchecked", "evenrow", "folder"),
+    (True, True): ("unchecked", "oddrow", "folder"),
+}
 
 
 class CustomDialog:
@@ -483,11 +600,128 @@ class ConfirmDialog(CustomDialog):
         return self.result
 
 
+class GatherWriter:
+    """Binary output file that queues writes and sends them with one writev().
+
+    Written bytes are kept by reference rather than copied into a buffer,
+    so callers must not mutate them afterwards.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        directory, name = os.path.split(path)
+        self._fd, self._temp_path = tempfile.mkstemp(
+            suffix=TEMP_SUFFIX, prefix=name + '.', dir=directory or os.curdir)
+        if hasattr(os, 'fchmod'):
+            os.fchmod(self._fd, OUTPUT_FILE_MODE)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Only a complete output replaces the destination
+        try:
+            self.close()
+        except BaseException:
+            self._discard()
+            raise
+        if exc_type is None:
+            os.replace(self._temp_path, self.path)
+        else:
+            self._discard()
+
+    def _discard(self):
+        try:
+            os.unlink(self._temp_path)
+        except OSError:
+            pass
+
+    def fileno(self):
+        return self._fd
+
+    def write(self, data):
+        size = len(data)
+        if size:
+            self._pending.append(data)
+            self._pending_bytes += size
+            if self._pending_bytes >= WRITEV_MAX_BYTES or len(self._pending) >= WRITEV_MAX_ENTRIES:
+                self.flush()
+        return size
+
+    def flush(self):
+        pending = self._pending
+        if not pending:
+            return
+        written = os.writev(self._fd, pending) if USE_WRITEV else 0
+        if written < self._pending_bytes:
+            # Short write (rare for regular files) or no writev(): finish plainly
+            rest = memoryview(b"".join(pending))[written:]
+            while rest:
+                rest = rest[os.write(self._fd, rest):]
+        self._pending = []
+        self._pending_bytes = 0
+
+    def close(self):
+        if self._fd < 0:
+            return
+        try:
+            self.flush()
+            if FADVISE_DONTNEED is not None:
+                # Start writeback and let the pages go, rather than have the
+                # archive push other files out of the cache
+                os.posix_fadvise(self._fd, 0, 0, FADVISE_DONTNEED)
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+
+
 class CheckboxTreeview(ttk.Treeview):
     """Custom Treeview with checkboxes."""
+
+    # Icons as (color, (x1, y1, x2, y2)) rectangle fills painted in order;
+    # Tk treats x2/y2 as exclusive and leaves unpainted pixels transparent
+    _CHECKED_RECTS = (
+        ("#8BAE66", (2, 2, 16, 16)),   # Background
+        ("#EBD5AB", (2, 2, 4, 4)),     # Rounded corners, match background
+        ("#EBD5AB", (14, 2, 16, 4)),
+        ("#EBD5AB", (2, 14, 4, 16)),
+        ("#EBD5AB", (14, 14, 16, 16)),
+        ("#1B211A", (4, 8, 8, 12)),    # Check mark
+        ("#1B211A", (7, 4, 13, 12)),
+        ("#1B211A", (12, 4, 14, 6)),
+        ("#1B211A", (7, 5, 14, 14)),
+        ("#1B211A", (3, 9, 8, 14)),
+    )
+    _UNCHECKED_RECTS = (
+        ("#628141", (2, 2, 16, 16)),   # Border
+        ("#EBD5AB", (3, 3, 15, 15)),   # Interior
+    )
+    _MIXED_RECTS = (
+        ("#8BAE66", (2, 2, 16, 16)),   # Border
+        ("#EBD5AB", (3, 3, 15, 15)),   # Interior
+        ("#1B211A", (5, 8, 13, 10)),   # Horizontal bar
+    )
+
+    # (checked, unchecked, mixed) icons shared by every tree, and the Tk
+    # interpreter they were created in
+    _icons = None
+    _icons_tk = None
+
     def __init__(self, master=None, **kw):
         super().__init__(master, **kw)
 
+        # Check state per item, mirrored here so reads avoid Tcl round-trips
+        self._tag_state = {}
+        # Checked items, plus a sort key per item to report them in tree order
+        self._checked_set = set()
+        self._insert_order = {}
+        self._child_counts = {}
+        # Tree structure, mirrored so walks need no get_children()/parent() calls
+        self._children = {}
+        self._parents = {}
+
         # Create checkbox images
         self._create_checkbox_images()
 
@@ -501,127 +735,215 @@ class CheckboxTreeview(ttk.Treeview):
         self.bind("<Double-1>", self._handle_double_click)
 
     def _create_checkbox_images(self):
-        """Create checkbox images using canvas."""
-        # Create checked icon with custom color
-        self.checked_icon = tk.PhotoImage(width=18, height=18)
-        # Draw rounded rectangle background
-        for x in range(18):
-            for y in range(18):
-                if 2 <= x <= 15 and 2 <= y <= 15:
-                    # Create rounded effect
-                    if (x < 4 or x > 13) and (y < 4 or y > 13):
-                        self.checked_icon.put("#EBD5AB", (x, y))  # Match background
-                    else:
-                        self.checked_icon.put("#8BAE66", (x, y))
-        
-        # Draw check mark
-        check_points = [(4, 8), (7, 11), (12, 4), (13, 5), (7, 13), (3, 9)]
-        for i in range(len(check_points)-1):
-            x1, y1 = check_points[i]
-            x2, y2 = check_points[i+1]
-            for x in range(min(x1, x2), max(x1, x2)+1):
-                for y in range(min(y1, y2), max(y1, y2)+1):
-                    self.checked_icon.put("#1B211A", (x, y))
-
-        # Create unchecked icon
-        self.unchecked_icon = tk.PhotoImage(width=18, height=18)
-        # Draw border
-        for x in range(18):
-            for y in range(18):
-                if 2 <= x <= 15 and 2 <= y <= 15:
-                    if x == 2 or x == 15 or y == 2 or y == 15:
-                        self.unchecked_icon.put("#628141", (x, y))
-                    else:
-                        self.unchecked_icon.put("#EBD5AB", (x, y))
-
-        # Create mixed state icon
-        self.mixed_icon = tk.PhotoImage(width=18, height=18)
-        # Draw border
-        for x in range(18):
-            for y in range(18):
-                if 2 <= x <= 15 and 2 <= y <= 15:
-                    if x == 2 or x == 15 or y == 2 or y == 15:
-                        self.mixed_icon.put("#8BAE66", (x, y))
-                    else:
-                        self.mixed_icon.put("#EBD5AB", (x, y))
-        
-        # Draw horizontal line
-        for x in range(5, 13):
-            self.mixed_icon.put("#1B211A", (x, 8))
-            self.mixed_icon.put("#1B211A", (x, 9))
+        """Create checkbox images from a few rectangle fills each.
+
+        They are built by the first tree and reused by later ones, as long
+        as those belong to the same Tk interpreter.
+        """
+        cls = CheckboxTreeview
+        if cls._icons_tk is not self.tk:
+            cls._icons = (self._paint_icon(self, self._CHECKED_RECTS),
+                          self._paint_icon(self, self._UNCHECKED_RECTS),
+                          self._paint_icon(self, self._MIXED_RECTS))
+            cls._icons_tk = self.tk
+        self.checked_icon, self.unchecked_icon, self.mixed_icon = cls._icons
+
+    @staticmethod
+    def _paint_icon(master, rects):
+        """Paint an 18x18 icon with one PhotoImage.put call per rectangle."""
+        icon = tk.PhotoImage(master=master, width=18, height=18)
+        for color, rect in rects:
+            icon.put(color, to=rect)
+        return icon
+
+    def _clicked_tree_item(self, event):
+        """Return the item under a click in the tree column, or ""."""
+        # Row first: clicks on headings or empty space stop after one call
+        item = self.identify_row(event.y)
+        if item and self.identify_column(event.x) == "#0":
+            return item
+        return ""
 
     def _handle_click(self, event):
         """Handle single click to toggle checkbox."""
-        region = self.identify("region", event.x, event.y)
-        if region == "tree":
-            item = self.identify("item", event.x, event.y)
-            if item:
-                self.toggle_check(item)
+        item = self._clicked_tree_item(event)
+        if item:
+            self.toggle_check(item)
 
     def _handle_double_click(self, event):
         """Handle double click to expand/collapse folders."""
-        region = self.identify("region", event.x, event.y)
-        if region == "tree":
-            item = self.identify("item", event.x, event.y)
-            if item and self.item(item, "open"):
+        item = self._clicked_tree_item(event)
+        if item:
+            if self.item(item, "open"):
                 self.item(item, open=False)
-            elif item:
+            else:
+                # Announce the open like the expand arrow does, so lazily
+                # loaded folders can fill in their children first
+                self.focus(item)
+                self.event_generate("<<TreeviewOpen>>")
                 self.item(item, open=True)
 
+    def insert(self, parent, index, iid=None, **kw):
+        """Insert an item and record its initial check state."""
+        item = super().insert(parent, index, iid=iid, **kw)
+        # The parent's key plus the child's position sorts in display order
+        # even when a folder's children are inserted after its siblings
+        position = self._child_counts.get(parent, 0)
+        self._child_counts[parent] = position + 1
+        self._insert_order[item] = self._insert_order.get(parent, ()) + (position,)
+        siblings = self._children.setdefault(parent, [])
+        if index == "end":
+            siblings.append(item)
+        else:
+            siblings.insert(int(index), item)
+        self._parents[item] = parent
+        tags = kw.get("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        for state in ("checked", "unchecked", "mixed"):
+            if state in tags:
+                self._tag_state[item] = state
+                if state == "checked":
+                    self._checked_set.add(item)
+                break
+        return item
+
+    def delete(self, *items):
+        """Delete items and forget the check state of their subtrees."""
+        children = self._children
+        parents = self._parents
+        for item in items:
+            siblings = children.get(parents.get(item))
+            if siblings and item in siblings:
+                siblings.remove(item)
+        stack = list(items)
+        while stack:
+            item = stack.pop()
+            self._tag_state.pop(item, None)
+            self._checked_set.discard(item)
+            self._insert_order.pop(item, None)
+            self._child_counts.pop(item, None)
+            parents.pop(item, None)
+            stack.extend(children.pop(item, ()))
+        super().delete(*items)
+
+    def clear(self):
+        """Delete every item in the tree."""
+        super().delete(*self._children.get("", ()))
+        self._tag_state.clear()
+        self._checked_set.clear()
+        self._insert_order.clear()
+        self._child_counts.clear()
+        self._children.clear()
+        self._parents.clear()
+
+    def get_check_state(self, item):
+        """Return "checked", "unchecked" or "mixed" for an item."""
+        return self._tag_state.get(item)
+
+    def _set_check_state(self, item, state):
+        """Set an item's check state in both the tree and the cache."""
+        # Swap only the check tag, so row and file/folder tags stay put
+        old_state = self._tag_state.get(item)
+        if old_state:
+            self.tk.call(self._w, "tag", "remove", old_state, (item,))
+        self.tk.call(self._w, "tag", "add", state, (item,))
+        self._tag_state[item] = state
+        if state == "checked":
+            self._checked_set.add(item)
+        else:
+            self._checked_set.discard(item)
+
     def toggle_check(self, item):
         """Toggle checkbox state for an item."""
-        current_tags = self.item(item, "tags")
-        if "checked" in current_tags:
-            self.item(item, tags=("unchecked",))
+        if self._tag_state.get(item) == "checked":
+            self._set_check_state(item, "unchecked")
             self._propagate_check_state(item, False)
         else:
-            self.item(item, tags=("checked",))
+            self._set_check_state(item, "checked")
             self._propagate_check_state(item, True)
 
     def _propagate_check_state(self, item, checked):
         """Propagate check state to children and update parent state."""
-        # Update children
-        children = self.get_children(item)
-        for child in children:
-            self.item(child, tags=("checked",) if checked else ("unchecked",))
-            self._propagate_check_state(child, checked)
+        # Update descendants with an explicit stack rather than recursion
+        children = self._children
+        descendants = []
+        stack = list(children.get(item, ()))
+        while stack:
+            child = stack.pop()
+            descendants.append(child)
+            stack.extend(children.get(child, ()))
+        self._set_check_states(descendants, "checked" if checked else "unchecked")
 
         # Update parent if needed
-        parent = self.parent(item)
-        if parent and parent != "":
+        parent = self._parents.get(item)
+        if parent:
             self._update_parent_check_state(parent)
 
     def _update_parent_check_state(self, parent):
-        """Update parent checkbox based on children states."""
-        children = self.get_children(parent)
-        if not children:
-            return
-
-        all_checked = all("checked" in self.item(child, "tags") for child in children)
-        any_checked = any("checked" in self.item(child, "tags") for child in children)
-        all_unchecked = all("unchecked" in self.item(child, "tags") for child in children)
+        """Update parent checkboxes from their children, walking up while they change."""
+        while parent:
+            children = self._children.get(parent)
+            if not children:
+                return
+
+            # Count child states in one pass, stopping as soon as the result is mixed
+            n_checked = n_unchecked = 0
+            for child in children:
+                state = self._tag_state.get(child)
+                if state == "checked":
+                    n_checked += 1
+                elif state == "unchecked":
+                    n_unchecked += 1
+                else:
+                    break
+                if n_checked and n_unchecked:
+                    break
+
+            if n_checked == len(children):
+                new_state = "checked"
+            elif n_unchecked == len(children):
+                new_state = "unchecked"
+            else:
+                new_state = "mixed"
 
-        if all_checked:
-            self.item(parent, tags=("checked",))
-        elif all_unchecked:
-            self.item(parent, tags=("unchecked",))
-        else:
-            self.item(parent, tags=("mixed",))
+            # An unchanged parent leaves every ancestor above it unchanged too
+            if self._tag_state.get(parent) == new_state:
+                return
+            self._set_check_state(parent, new_state)
+            parent = self._parents.get(parent)
 
     def get_checked_items(self):
-        """Get all checked items."""
-        checked_items = []
+        """Get all checked items in tree order."""
+        # Sorting by display key avoids walking the tree
+        return sorted(self._checked_set, key=self._insert_order.__getitem__)
 
-        def traverse(item):
-            if "checked" in self.item(item, "tags"):
-                checked_items.append(item)
-            for child in self.get_children(item):
-                traverse(child)
-
-        for child in self.get_children():
-            traverse(child)
+    def check_all(self):
+        """Check every item in the tree."""
+        self._set_check_states(tuple(self._tag_state), "checked")
 
-        return checked_items
+    def uncheck_all(self):
+        """Uncheck every item in the tree."""
+        self._set_check_states(tuple(self._tag_state), "unchecked")
+
+    def _set_check_states(self, items, state):
+        """Give several items the same check state, with one Tcl call per tag."""
+        # Items already in that state need no retagging
+        tag_state = self._tag_state
+        items = [item for item in items if tag_state.get(item) != state]
+        if not items:
+            return
+        # "tag remove"/"tag add" take the whole item list at once
+        call = self.tk.call
+        for other in ("checked", "unchecked", "mixed"):
+            if other != state:
+                call(self._w, "tag", "remove", other, items)
+        call(self._w, "tag", "add", state, items)
+        tag_state.update(dict.fromkeys(items, state))
+        if state == "checked":
+            self._checked_set.update(items)
+        else:
+            self._checked_set.difference_update(items)
 
 
 class CodebaseCompilerApp:
@@ -650,9 +972,23 @@ class CodebaseCompilerApp:
         self.loading_thread = None
         self.stop_loading_flag = False
         self.is_loading = False
+        # Bumped by each load, so a count still running for an older one
+        # stops and its result is dropped
+        self._load_generation = 0
+        # Tree item ids are sequential numbers, unique for the app's lifetime
+        self._next_item_id = itertools.count(1).__next__
+        
+        # Compilations run in order on one long-lived worker, so compiling
+        # again doesn't start a new thread each time
+        self._jobs = queue.SimpleQueue()
+        threading.Thread(target=self._run_jobs, daemon=True).start()
         
         # Queue for communication between threads
-        self.queue = queue.Queue()
+        # A bare deque: append() and popleft() are atomic, and with a single
+        # consumer no lock or condition variable is needed
+        self.queue = deque()
+        # Whether a <<QueueReady>> wakeup is already on its way to process_queue
+        self._queue_wakeup_pending = False
         
         # Configure root window
         self.root.configure(bg=self.colors['background'])
@@ -788,6 +1124,9 @@ class CodebaseCompilerApp:
         self.vsb.config(command=self.tree.yview)
         self.hsb.config(command=self.tree.xview)
         
+        # Folder contents are loaded on first expand
+        self.tree.bind("<<TreeviewOpen>>", self._on_tree_open)
+        
         # Merged status bar frame
         self.status_bar = tk.Frame(self.tree_container, bg=self.colors['surface'], height=30)
         self.status_bar.grid(row=1, column=0, sticky="ew", padx=15, pady=(0, 15))
@@ -1025,17 +1364,29 @@ class CodebaseCompilerApp:
         # Configure styles
         self._configure_styles()
         
-        # Start queue processing
-        self.root.after(100, self.process_queue)
+        # Drain the queue when a worker posts to it, rather than polling
+        self.root.bind('<<QueueReady>>', lambda event: self.process_queue())
 
         self.current_folder = None
-        self.file_items = {}
+        # Per-item path string and folder flag, kept as parallel dicts keyed by item id
+        self.item_paths = {}
+        self.item_is_dir = {}
+        # File item id -> (size, mtime) from the scan, so compiling skips a stat
+        self.item_stats = {}
+        # Placeholder item id -> folder path, for folders not expanded yet
+        self.unloaded_folders = {}
+        # (path, is_dir) -> True for entries the root .gitignore excludes,
+        # or None without one
+        self.is_ignored = None
+        self.total_folders = 0
+        self.total_files = 0
         self.output_dir = None
 
         # Initialize default output directory
         self.update_full_output_path()
         
-        # Bind window resize
+        # Bind window resize (debounced, see _on_window_resize)
+        self._resize_after_id = None
         self.root.bind('<Configure>', self._on_window_resize)
         
         # Center window
@@ -1105,7 +1456,17 @@ class CodebaseCompilerApp:
 
     def _on_window_resize(self, event):
         """Handle window resize events."""
-        # Update column widths on resize
+        # <Configure> on the root also fires for every child widget; only the
+        # window itself matters, and only once the drag has settled
+        if event.widget is not self.root:
+            return
+        if self._resize_after_id:
+            self.root.after_cancel(self._resize_after_id)
+        self._resize_after_id = self.root.after(50, self._apply_resize)
+
+    def _apply_resize(self):
+        """Update column widths for the current window size."""
+        self._resize_after_id = None
         if hasattr(self, 'tree'):
             tree_width = self.tree.winfo_width()
             if tree_width > 100:
@@ -1161,8 +1522,10 @@ class CodebaseCompilerApp:
             self.show_error_dialog("Error", "Invalid folder path")
             return
 
-        # Clear existing tree
+        # Clear existing tree and hide its columns while items stream in
         self.clear_tree()
+        self.begin_tree_update()
+        self.is_ignored = self._load_ignore_rules(str(self.current_folder))
         
         # Show loading state in status bar
         self.show_loading_state("Scanning directory...")
@@ -1170,6 +1533,7 @@ class CodebaseCompilerApp:
         # Set loading flag
         self.is_loading = True
         self.stop_loading_flag = False
+        self._load_generation += 1
         
         # Disable buttons during loading
         self.set_buttons_state('disabled')
@@ -1177,123 +1541,316 @@ class CodebaseCompilerApp:
         # Start loading in a separate thread
         self.loading_thread = threading.Thread(
             target=self._load_tree_thread,
-            args=(self.current_folder,),
+            args=(self.current_folder, self._load_generation),
             daemon=True
         )
         self.loading_thread.start()
 
-    def _load_tree_thread(self, folder_path):
+    def _load_tree_thread(self, folder_path, generation):
         """Thread function for loading directory tree."""
-        file_items = {}
-        total_files = 0
-        total_folders = 0
+        def is_stale():
+            # Cancelled, or replaced by a newer load
+            return self.stop_loading_flag or generation != self._load_generation
         
         try:
-            # Initial scan to get counts (fast)
-            for root, dirs, files in os.walk(folder_path):
-                if self.stop_loading_flag:
-                    self.queue.put(('loading_cancelled', None))
+            # Only the top level goes into the tree now; folders load on expand
+            rows = self._scan_folder(folder_path, "")
+            for start in range(0, len(rows), QUEUE_BATCH_SIZE):
+                if is_stale():
                     return
-                
-                total_folders += len(dirs)
-                total_files += len(files)
-                
-                # Update progress every 1000 items found
-                if (total_files + total_folders) % 1000 == 0:
-                    self.queue.put(('loading_progress', 
-                                   f"Found {total_folders} folders, {total_files} files..."))
-            
-            self.queue.put(('loading_progress', 
-                           f"Found {total_folders} folders, {total_files} files. Building tree..."))
-            
-            # Now build the tree with proper structure
-            self._build_tree_structure(folder_path, file_items)
+                self.post_message('add_items', (generation, rows[start:start + QUEUE_BATCH_SIZE]))
             
-            if not self.stop_loading_flag:
-                self.queue.put(('loading_complete', file_items))
+            if is_stale():
+                return
+            self.post_message('loading_complete', (generation, None))
             
         except Exception as e:
-            if not self.stop_loading_flag:
-                self.queue.put(('loading_error', str(e)))
-
-    def _build_tree_structure(self, root_path, file_items):
-        """Build tree structure with proper hierarchy."""
-        row_index = 0
+            if not is_stale():
+                self.post_message('loading_error', (generation, str(e)))
+            return
         
-        def add_items(parent_path, parent_id=""):
-            nonlocal row_index
-            try:
-                # Get items and sort (folders first, then files)
-                items = []
-                for item in parent_path.iterdir():
-                    if self.stop_loading_flag:
-                        return
-                    
-                    if item.name.startswith('.'):
-                        continue
-                    
-                    items.append(item)
-                
-                # Sort: folders first, then by name
-                items.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
-                
-                for item in items:
-                    if self.stop_loading_flag:
-                        return
-                    
-                    relative_path = item.relative_to(root_path)
-                    display_name = item.name
-                    icon = "📁" if item.is_dir() else self._get_file_icon(item.name)
-
-                    # Get file info
-                    size = ""
-                    modified = ""
-                    if item.is_file():
-                        try:
-                            size = self._format_size(item.stat().st_size)
-                            modified_time = time.localtime(item.stat().st_mtime)
-                            modified = time.strftime("%Y-%m-%d %H:%M", modified_time)
-                        except:
-                            size = "N/A"
-                            modified = "N/A"
-
-                    # Insert item with alternating row colors
-                    row_tag = 'evenrow' if row_index % 2 == 0 else 'oddrow'
-                    
-                    # Send item to main thread for insertion
-                    self.queue.put(('add_item', {
-                        'parent_id': parent_id,
-                        'item_id': str(hash(item)),  # Use hash as unique ID
-                        'text': f"{icon} {display_name}",
-                        'values': (str(relative_path), size, modified),
-                        'tags': ("unchecked", row_tag, 'folder' if item.is_dir() else 'file'),
-                        'is_dir': item.is_dir(),
-                        'path': item,
-                        'relative_path': relative_path
-                    }))
-                    
-                    row_index += 1
-                    
-                    # Update progress every 100 items
-                    if row_index % 100 == 0:
-                        self.queue.put(('loading_progress', f"Loading... {row_index} items processed"))
+        # Count the whole tree only once the top level is on screen
+        counts = self._count_tree(folder_path, is_stale)
+        if counts is not None:
+            self.post_message('file_count', (generation, counts))
 
-                    # Recursively add subdirectories
-                    if item.is_dir():
-                        add_items(item, str(hash(item)))
+    def _count_tree(self, folder_path, is_stale):
+        """Count the folders and files below folder_path, as the tree lists them.
 
-            except Exception as e:
-                if not self.stop_loading_flag:
-                    self.queue.put(('loading_warning', f"Error accessing {parent_path}: {str(e)}"))
+        Returns (folders, files), or None once is_stale() is true.
+        """
+        total_folders = 0
+        total_files = 0
+        for entry in self._walk_tree(folder_path):
+            if entry.is_dir():
+                if is_stale():
+                    return None
+                total_folders += 1
+            else:
+                total_files += 1
+        return total_folders, total_files
+
+    def _walk_tree(self, folder_path, on_error=None):
+        """Yield the entries below folder_path in tree display order.
+
+        Symlinked folders are followed like the tree follows them when
+        expanded, but each real folder is listed only once so link loops
+        end. Folders that can't be listed are skipped, after calling
+        on_error(path, exception) if given.
+        """
+        try:
+            st = os.stat(folder_path)
+        except OSError as e:
+            if on_error is not None:
+                on_error(folder_path, e)
+            return
+        walked = {(st.st_dev, st.st_ino)}
+        stack = [folder_path]
+        while stack:
+            current = stack.pop()
+            if isinstance(current, os.DirEntry):
+                yield current
+                if not current.is_dir():
+                    continue
+                try:
+                    st = current.stat()
+                except OSError:
+                    continue
+                key = (st.st_dev, st.st_ino)
+                if key in walked:
+                    continue  # Already listed, through another path
+                walked.add(key)
+            try:
+                entries = self._list_folder(current)
+            except OSError as e:
+                if on_error is not None:
+                    on_error(os.fspath(current), e)
+                continue
+            # Push reversed so entries pop in display order
+            stack.extend(reversed(entries))
+
+    def _list_folder(self, folder_path):
+        """Return a folder's visible entries, folders first, then by name."""
+        with os.scandir(folder_path) as it:
+            entries = [entry for entry in it
+                       if entry.name[0] != '.' and entry.name not in EXCLUDED_NAMES]
+        is_ignored = self.is_ignored
+        if is_ignored is not None:
+            entries = [entry for entry in entries if not is_ignored(entry.path, entry.is_dir())]
+        # DirEntry caches is_dir, so sorting costs no extra syscalls
+        entries.sort(key=lambda e: (not e.is_dir(), e.name.lower()))
+        return entries
+
+    def _load_ignore_rules(self, folder_path):
+        """Compile the folder's .gitignore into an is_ignored(path, is_dir) test.
+
+        Handles the common subset: comments, * ? [...] and ** globs, a
+        leading or inner "/" anchoring to the root, and a trailing "/" for
+        folders only. Negated ("!") patterns are skipped. Returns None if
+        there is no .gitignore or no usable pattern in it.
+        """
+        try:
+            with open(os.path.join(folder_path, '.gitignore'), encoding='utf-8',
+                      errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+
+        any_patterns = []
+        dir_patterns = []
+        for line in lines:
+            line = line.rstrip()
+            if not line or line[0] in '#!':
+                continue
+            patterns = any_patterns
+            if line.endswith('/'):
+                line = line.rstrip('/')
+                patterns = dir_patterns
+            # A pattern with a slash is relative to the root; one without
+            # matches the name at any depth
+            anchored = '/' in line
+            line = line.lstrip('/')
+            if line:
+                regex = self._glob_to_regex(line)
+                patterns.append(regex if anchored else '(?:.*/)?' + regex)
+        if not any_patterns and not dir_patterns:
+            return None
+
+        # All patterns go into one alternation, compiled once per load
+        match_any = match_dir = None
+        if any_patterns:
+            match_any = re.compile('(?:%s)\\Z' % '|'.join(any_patterns)).match
+        if dir_patterns:
+            match_dir = re.compile('(?:%s)\\Z' % '|'.join(dir_patterns)).match
+        root_prefix_len = len(os.path.join(folder_path, ''))
+
+        def is_ignored(path, is_dir):
+            relative_path = path[root_prefix_len:]
+            if os.sep != '/':
+                relative_path = relative_path.replace(os.sep, '/')
+            return bool((match_any is not None and match_any(relative_path)) or
+                        (is_dir and match_dir is not None and match_dir(relative_path)))
+
+        return is_ignored
+
+    @staticmethod
+    def _glob_to_regex(pattern):
+        """Translate a gitignore glob into a regex; "*" never crosses a "/"."""
+        parts = []
+        i = 0
+        n = len(pattern)
+        while i < n:
+            c = pattern[i]
+            if pattern.startswith('**/', i):
+                parts.append('(?:.*/)?')  # Any number of folders, or none
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                parts.append('.*')
+                i += 2
+                continue
+            if c == '*':
+                parts.append('[^/]*')
+            elif c == '?':
+                parts.append('[^/]')
+            elif c == '[' and pattern.find(']', i + 2) > 0:
+                end = pattern.find(']', i + 2)
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body[0] == '!':
+                    body = '^' + body[1:]
+                parts.append('[' + body + ']')
+                i = end + 1
+                continue
+            elif c == '\\' and i + 1 < n:
+                parts.append(re.escape(pattern[i + 1]))
+                i += 2
+                continue
+            else:
+                parts.append(re.escape(c))
+            i += 1
+        return ''.join(parts)
+
+    def _scan_folder(self, folder_path, parent_id):
+        """Build the tree rows for one folder level, without recursing."""
+        # Prefix stripped from entry paths to get the path relative to the root
+        root_prefix_len = len(os.path.join(str(self.current_folder), ''))
+        # Bind hot lookups to locals for the per-entry loop
+        get_file_icon = self._get_file_icon
+        format_size = self._format_size
+        localtime = time.localtime
+        next_item_id = self._next_item_id
+        
+        try:
+            entries = self._list_folder(folder_path)
+        except Exception as e:
+            self.post_message('loading_warning', f"Error accessing {folder_path}: {str(e)}")
+            return []
+        
+        rows = []
+        for row_index, entry in enumerate(entries):
+            is_dir = entry.is_dir()
+            relative_path = entry.path[root_prefix_len:]
+            icon = "📁" if is_dir else get_file_icon(entry.name)
+
+            # Get file info from a single stat call
+            size = ""
+            modified = ""
+            file_stat = None
+            if not is_dir and entry.is_file():
+                try:
+                    st = entry.stat()
+                    file_stat = (st.st_size, st.st_mtime)
+                    size = format_size(st.st_size)
+                    # Same as strftime("%Y-%m-%d %H:%M") without parsing a format
+                    lt = localtime(st.st_mtime)
+                    modified = (f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} "
+                                f"{lt.tm_hour:02d}:{lt.tm_min:02d}")
+                except:
+                    size = "N/A"
+                    modified = "N/A"
+
+            # One plain tuple per row, unpacked positionally by _insert_tree_item
+            rows.append((
+                parent_id,
+                str(next_item_id()),
+                f"{icon} {entry.name}",
+                (relative_path, size, modified),
+                ROW_TAGS[(row_index & 1 == 1, is_dir)],  # Alternating row colors
+                is_dir,
+                entry.path,  # Plain str; nothing downstream needs a Path
+                file_stat  # (size, mtime), reused when compiling
+            ))
+        return rows
+
+    def _insert_tree_item(self, item_data, check_state=None):
+        """Insert a scanned row; folders get a placeholder child until expanded.
+
+        `item_data` is a row from _scan_folder: (parent_id, item_id, text,
+        values, tags, is_dir, path, stat).
+        """
+        parent_id, item_id, text, values, tags, is_dir, path, stat = item_data
+        if check_state:
+            tags = (check_state,) + tags[1:]
+        self.tree.insert(
+            parent_id,
+            "end",
+            iid=item_id,
+            text=text,
+            values=values,
+            tags=tags
+        )
+        
+        # Remember the item's path and kind for compilation
+        self.item_paths[item_id] = path
+        self.item_is_dir[item_id] = is_dir
+        if stat is not None:
+            self.item_stats[item_id] = stat
+        
+        if is_dir:
+            # The placeholder shows the expand arrow and carries the folder's
+            # check state, so a checked folder can be compiled unexpanded
+            placeholder_id = item_id + PLACEHOLDER_SUFFIX
+            self.tree.insert(item_id, "end", iid=placeholder_id, tags=(tags[0],))
+            self.unloaded_folders[placeholder_id] = path
+
+    def _on_tree_open(self, event):
+        """Load a folder's children the first time it is expanded."""
+        item_id = self.tree.focus()
+        placeholder_id = item_id + PLACEHOLDER_SUFFIX
+        folder_path = self.unloaded_folders.pop(placeholder_id, None)
+        if folder_path is None:
+            return
+        
+        # Children start in the folder's own state (never mixed while unloaded)
+        check_state = self.tree.get_check_state(placeholder_id)
+        self.tree.delete(placeholder_id)
+        for item_data in self._scan_folder(folder_path, item_id):
+            self._insert_tree_item(item_data, check_state)
 
-        # Start building from root
-        add_items(root_path)
+    def _collect_folder_files(self, folder_path):
+        """List the files under a folder in tree display order."""
+        def warn(path, e):
+            self.post_message('loading_warning', f"Error accessing {path}: {str(e)}")
+        return [entry.path for entry in self._walk_tree(folder_path, warn)
+                if not entry.is_dir()]
 
     def clear_tree(self):
         """Clear the treeview."""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.file_items.clear()
+        self.tree.clear()
+        self.item_paths.clear()
+        self.item_is_dir.clear()
+        self.item_stats.clear()
+        self.unloaded_folders.clear()
+
+    def begin_tree_update(self):
+        """Unmap the tree and hide its detail columns so bulk inserts skip redraws."""
+        self.tree.grid_remove()
+        self.tree.configure(displaycolumns=())
+
+    def end_tree_update(self):
+        """Restore the detail columns and map the tree again after a bulk insert."""
+        self.tree.configure(displaycolumns="#all")
+        self.tree.grid()
 
     def show_loading_state(self, message):
         """Show loading state in the status bar."""
@@ -1319,7 +1876,7 @@ class CodebaseCompilerApp:
         if self.is_loading:
             self.stop_loading_flag = True
             self.is_loading = False
-            self.queue.put(('loading_cancelled', None))
+            self.post_message('loading_cancelled', (self._load_generation, None))
             self.show_normal_state()
             self.set_buttons_state('normal')
             self.status_var.set("Loading cancelled")
@@ -1334,45 +1891,62 @@ class CodebaseCompilerApp:
         self.compile_btn.config(state=state_normal)
         self.select_output_btn.config(state=state_normal)
 
+    def post_message(self, msg_type, message):
+        """Queue a message for the UI and wake process_queue if needed."""
+        self.queue.append((msg_type, message))
+        if not self._queue_wakeup_pending:
+            self._queue_wakeup_pending = True
+            try:
+                # Tkinter hands a worker thread's call over to the main loop
+                # and blocks the worker until the main loop has run it. The
+                # pending flag limits that wait to once per queue drain.
+                self.root.event_generate('<<QueueReady>>', when='tail')
+            except (tk.TclError, RuntimeError):
+                # Window is closing; let a later post try again
+                self._queue_wakeup_pending = False
+
     def process_queue(self):
         """Process messages from worker threads."""
+        # Cleared before draining, so anything posted from here on wakes us again
+        self._queue_wakeup_pending = False
+        insert_tree_item = self._insert_tree_item
+        load_generation = self._load_generation
         try:
-            while True:
-                msg_type, message = self.queue.get_nowait()
+            # Bound the work per tick so a large load never blocks the UI
+            popleft = self.queue.popleft
+            budget = QUEUE_BATCH_SIZE
+            while budget > 0:
+                msg_type, message = popleft()
+                budget -= 1
+                if msg_type in LOAD_MESSAGES:
+                    generation, message = message
+                    if generation != load_generation:
+                        continue  # From a load that was cancelled or replaced
                 
-                if msg_type == 'add_item':
-                    # Add item to treeview
-                    item_data = message
-                    self.tree.insert(
-                        item_data['parent_id'], 
-                        "end", 
-                        iid=item_data['item_id'],
-                        text=item_data['text'],
-                        values=item_data['values'],
-                        tags=item_data['tags']
-                    )
-                    
-                    # Store in file_items
-                    self.file_items[item_data['item_id']] = {
-                        'path': item_data['path'],
-                        'is_dir': item_data['is_dir'],
-                        'relative_path': item_data['relative_path']
-                    }
-                    
-                elif msg_type == 'loading_progress':
-                    # Update status text with loading progress
-                    self.status_var.set(message)
+                if msg_type == 'add_items':
+                    # Add a batch of rows to the treeview, each counted
+                    # against this tick's budget
+                    for item_data in message:
+                        insert_tree_item(item_data)
+                    budget -= len(message) - 1
                     
                 elif msg_type == 'loading_complete':
                     self.is_loading = False
+                    self.end_tree_update()
                     self.show_normal_state()
                     self.set_buttons_state('normal')
-                    self.update_file_count()
+                    # Totals follow in a 'file_count' message
+                    self.file_count_var.set("Counting files...")
                     # Update the status text
                     self.status_var.set(f"Loaded folder: {self.current_folder.name}")
                     
+                elif msg_type == 'file_count':
+                    self.total_folders, self.total_files = message
+                    self.update_file_count()
+                    
                 elif msg_type == 'loading_cancelled':
                     self.is_loading = False
+                    self.end_tree_update()
                     self.show_normal_state()
                     self.set_buttons_state('normal')
                     # Update the status text
@@ -1380,6 +1954,7 @@ class CodebaseCompilerApp:
                     
                 elif msg_type == 'loading_error':
                     self.is_loading = False
+                    self.end_tree_update()
                     self.show_normal_state()
                     self.set_buttons_state('normal')
                     self.root.after(0, lambda: self.show_error_dialog("Error", f"Failed to load folder: {message}"))
@@ -1397,6 +1972,12 @@ class CodebaseCompilerApp:
                 elif msg_type == 'progress':
                     self.progress_var.set(message)
                     
+                elif msg_type == 'progress_status':
+                    # Compile progress: bar position and status text together
+                    progress, status = message
+                    self.progress_var.set(progress)
+                    self.status_var.set(status)
+                    
                 elif msg_type == 'progress_complete':
                     self.progress_frame.grid_remove()
                     
@@ -1408,10 +1989,13 @@ class CodebaseCompilerApp:
                     self.status_var.set(message)
                     self.status_label.config(fg=self.colors['error'])
                     
-        except queue.Empty:
+        except IndexError:  # Queue drained
             pass
         finally:
-            self.root.after(50, self.process_queue)  # Check queue every 50ms
+            # Come straight back while a backlog remains; otherwise the next
+            # post_message() wakes us
+            if self.queue:
+                self.root.after(16, self.process_queue)
 
     def refresh_tree(self):
         """Refresh the treeview with current folder."""
@@ -1420,67 +2004,45 @@ class CodebaseCompilerApp:
 
     def _get_file_icon(self, filename):
         """Get appropriate emoji icon for file type."""
-        ext = os.path.splitext(filename)[1].lower()
-        
-        icon_map = {
-            '.py': '🐍', '.js': '📜', '.jsx': '⚛️', '.ts': '📘', '.tsx': '⚛️',
-            '.html': '🌐', '.css': '🎨', '.scss': '🎨', '.sass': '🎨',
-            '.java': '☕', '.cpp': '🔧', '.c': '🔧', '.h': '📋',
-            '.json': '📦', '.xml': '📄', '.yml': '⚙️', '.yaml': '⚙️',
-            '.md': '📝', '.txt': '📃', '.csv': '📊', '.sql': '🗄️',
-            '.jpg': '🖼️', '.jpeg': '🖼️', '.png': '🖼️', '.gif': '🖼️',
-            '.pdf': '📕', '.doc': '📘', '.docx': '📘', '.xls': '📗', '.xlsx': '📗',
-            '.zip': '🗜️', '.tar': '🗜️', '.gz': '🗜️', '.7z': '🗜️',
-            '.exe': '⚙️', '.dll': '🔧', '.so': '🔧', '.dylib': '🔧',
-            '.sh': '🐚', '.bash': '🐚', '.zsh': '🐚',
-            '.php': '🐘', '.rb': '💎', '.go': '🐹', '.rs': '🦀',
-            '.swift': '🐦', '.kt': '🅺', '.dart': '🎯',
-        }
-        
-        return icon_map.get(ext, '📄')
+        dot = filename.rfind('.')
+        if dot <= 0:
+            return DEFAULT_FILE_ICON  # No extension, or a dotfile like .bashrc
+        return ICON_MAP.get(filename[dot:].lower(), DEFAULT_FILE_ICON)
 
     def _format_size(self, size_in_bytes):
         """Format file size in human readable format."""
-        if size_in_bytes < 1024:
+        index = min(max(0, size_in_bytes.bit_length() - 1) // 10, 3)
+        if index == 0:
             return f"{size_in_bytes} B"
-        elif size_in_bytes < 1024 * 1024:
-            return f"{size_in_bytes / 1024:.1f} KB"
-        elif size_in_bytes < 1024 * 1024 * 1024:
-            return f"{size_in_bytes / (1024 * 1024):.1f} MB"
-        else:
-            return f"{size_in_bytes / (1024 * 1024 * 1024):.1f} GB"
+        unit, divisor = SIZE_UNITS[index]
+        return f"{size_in_bytes / divisor:.1f} {unit}"
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _format_mtime(mtime):
+        """Format whole-second mtimes; files checked out together share them."""
+        # Same as strftime("%Y-%m-%d %H:%M:%S") without parsing a format
+        lt = time.localtime(mtime)
+        return (f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} "
+                f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}")
 
     def update_file_count(self):
         """Update the file count display."""
-        file_count = sum(1 for item in self.file_items.values() if not item['is_dir'])
-        folder_count = sum(1 for item in self.file_items.values() if item['is_dir'])
-        self.file_count_var.set(f"📁 {folder_count} folders | 📄 {file_count} files")
+        self.file_count_var.set(f"📁 {self.total_folders} folders | 📄 {self.total_files} files")
 
     def check_all(self):
         """Check all items in the tree."""
         if self.is_loading:
             return
-            
-        def check_recursive(item_id):
-            self.tree.item(item_id, tags=("checked",))
-            for child in self.tree.get_children(item_id):
-                check_recursive(child)
 
-        for item in self.tree.get_children():
-            check_recursive(item)
+        self.tree.check_all()
 
     def uncheck_all(self):
         """Uncheck all items in the tree."""
         if self.is_loading:
             return
-            
-        def uncheck_recursive(item_id):
-            self.tree.item(item_id, tags=("unchecked",))
-            for child in self.tree.get_children(item_id):
-                uncheck_recursive(child)
 
-        for item in self.tree.get_children():
-            uncheck_recursive(item)
+        self.tree.uncheck_all()
 
     def compile_selected(self):
         """Compile selected files into a single text file."""
@@ -1489,11 +2051,24 @@ class CodebaseCompilerApp:
             return
             
         checked_items = self.tree.get_checked_items()
-        selected_files = [self.file_items[item_id]['path']
-                         for item_id in checked_items
-                         if not self.file_items[item_id]['is_dir']]
-
-        if not selected_files:
+        item_paths = self.item_paths
+        item_is_dir = self.item_is_dir
+        unloaded_folders = self.unloaded_folders
+        # (path, size, mtime) per file; size and mtime are None when the tree
+        # never stat'ed the file
+        item_stats = self.item_stats
+        selected_files = []
+        # Checked folders never expanded, as (position in selected_files,
+        # folder path); the compile worker lists their files from disk
+        selected_folders = []
+        for item_id in checked_items:
+            if item_id in unloaded_folders:
+                selected_folders.append((len(selected_files), unloaded_folders[item_id]))
+            elif not item_is_dir[item_id]:
+                size, mtime = item_stats.get(item_id, (None, None))
+                selected_files.append((item_paths[item_id], size, mtime))
+
+        if not selected_files and not selected_folders:
             self.show_warning_dialog("No Files Selected", 
                                    "Please select at least one file to compile.")
             return
@@ -1512,14 +2087,20 @@ class CodebaseCompilerApp:
         
         full_output_path = os.path.join(output_dir, output_file)
 
+        # Unexpanded folders are only listed by the worker, so count them
+        # separately rather than walking them here
+        selection = f"{len(selected_files)} files"
+        if selected_folders:
+            selection += f" and {len(selected_folders)} unexpanded folders"
+
         # Ask for confirmation using custom dialog
         confirm_dialog = ConfirmDialog(
             self.root,
             self.colors,
             "Confirm Compilation",
-            f"📦 You are about to compile {len(selected_files)} files\n\n"
+            f"📦 You are about to compile {selection}\n\n"
             f"📁 Output: {full_output_path}\n"
-            f"📄 Files selected: {len(selected_files)}"
+            f"📄 Selected: {selection}"
         )
         
         confirm = confirm_dialog.show()
@@ -1530,89 +2111,240 @@ class CodebaseCompilerApp:
         self.progress_frame.grid()
         self.progress_var.set(0)
         
-        # Start compilation in a separate thread
-        threading.Thread(target=self._compile_files_thread, 
-                        args=(selected_files, full_output_path), 
-                        daemon=True).start()
+        # Hand the compilation to the background worker
+        self._jobs.put((self._compile_files_thread,
+                        (selected_files, selected_folders, full_output_path)))
 
-    def _compile_files_thread(self, files, full_output_path):
-        """Thread function for compiling files."""
+    def _run_jobs(self):
+        """Worker loop running queued (function, args) jobs one at a time."""
+        while True:
+            function, args = self._jobs.get()
+            try:
+                function(*args)
+            except Exception:
+                # Keep the worker alive for the next job
+                traceback.print_exc()
+
+    def _count_lines(self, infile):
+        """Count lines in a binary file, a final line without newline included."""
+        if FADVISE_SEQUENTIAL is not None:
+            # Only large files get here; let the kernel read further ahead
+            os.posix_fadvise(infile.fileno(), 0, 0, FADVISE_SEQUENTIAL)
+        # Read into one reused buffer and count in place, so no bytes object
+        # is allocated per chunk
+        buffer = bytearray(COPY_CHUNK_SIZE)
+        readinto = infile.readinto
+        line_count = 0
+        last_byte = 0x0A
+        while True:
+            length = readinto(buffer)
+            if not length:
+                break
+            line_count += buffer.count(b"\n", 0, length)
+            last_byte = buffer[length - 1]
+        if last_byte != 0x0A:
+            line_count += 1  # Final line without a newline
+        return line_count
+
+    def _read_source_file(self, file_path, size, mtime):
+        """Line-count a file for compiling; small files are read whole.
+
+        `size` and `mtime` come from the tree scan, or are None if it never
+        stat'ed the file. Returns (size, mtime, line_count, data), with data
+        None for large files, which the writer streams instead.
+        """
+        # Unbuffered: read() of the whole file is then a single sized read
+        # straight into the result, as Path.read_bytes() does
+        with open(file_path, 'rb', buffering=0) as infile:
+            if size is None or size >= LARGE_FILE_SIZE:
+                # Unknown, or large enough that the exact size drives the copy
+                stats = os.fstat(infile.fileno())
+                size, mtime = stats.st_size, stats.st_mtime
+                if size >= LARGE_FILE_SIZE:
+                    return size, mtime, self._count_lines(infile), None
+            # Read at most one byte past the known size, so memory stays bounded
+            # even if the file has grown since it was stat'ed
+            data = infile.read(size + 1)
+            if len(data) > size:
+                # It grew: stream it like a large file instead
+                stats = os.fstat(infile.fileno())
+                infile.seek(0)
+                return stats.st_size, stats.st_mtime, self._count_lines(infile), None
+        line_count = data.count(b"\n")
+        if data and not data.endswith(b"\n"):
+            line_count += 1
+        # The length read is exact even if the file changed since the scan
+        return len(data), mtime, line_count, data
+
+    def _copy_in_kernel(self, in_fd, out_fd, size):
+        """Copy a file's bytes to the output without passing them through Python.
+
+        Returns the number of bytes copied, or None if no kernel copy
+        works between these two files.
+        """
+        for kernel_copy in KERNEL_COPIES:
+            offset = 0
+            try:
+                while offset < size:
+                    copied = kernel_copy(in_fd, out_fd, offset, size - offset)
+                    if copied == 0:
+                        break  # File shrank while we were copying
+                    offset += copied
+                if offset:
+                    return offset
+                # Some filesystems report 0 bytes rather than an error, so
+                # an empty first copy means try the next method
+            except OSError as e:
+                # Only fall back before anything was copied
+                if offset or e.errno not in KERNEL_COPY_UNSUPPORTED:
+                    raise
+        return None
+
+    def _copy_file_contents(self, infile, outfile, size):
+        """Append a file's bytes to the output, in the kernel where possible.
+
+        Returns the number of bytes copied.
+        """
+        if FADVISE_SEQUENTIAL is not None:
+            os.posix_fadvise(infile.fileno(), 0, 0, FADVISE_SEQUENTIAL)
+        # Flushing for a kernel copy only pays off for large files; smaller
+        # ones are cheaper to queue with the rest of the output
+        if KERNEL_COPIES and size >= LARGE_FILE_SIZE:
+            # Anything still queued must land before the kernel appends
+            outfile.flush()
+            copied = self._copy_in_kernel(infile.fileno(), outfile.fileno(), size)
+            if copied is not None:
+                return copied
+        shutil.copyfileobj(infile, outfile, COPY_CHUNK_SIZE)
+        return infile.tell()
+
+    def _compile_files_thread(self, files, folders, full_output_path):
+        """Thread function for compiling files, given as (path, size, mtime).
+
+        `folders` lists checked folders that were never expanded, as
+        (position in files, folder path); their files are read from disk
+        here and spliced in at that position.
+        """
         try:
+            if folders:
+                self.post_message('status', "Listing files in unexpanded folders...")
+                files = list(files)
+                # Splice from the back so earlier positions stay valid
+                for position, folder_path in reversed(folders):
+                    files[position:position] = [(path, None, None) for path in
+                                                self._collect_folder_files(folder_path)]
+            if not files:
+                self.post_message('error', "No files to compile")
+                self.root.after(0, lambda: self.show_warning_dialog(
+                    "No Files Selected",
+                    "The selected folders contain no files to compile."))
+                return
+
             total_files = len(files)
             processed = 0
             errors = []
-
-            with open(full_output_path, 'w', encoding='utf-8') as outfile:
-                # Write header with custom colors in comments
-                outfile.write("=" * 70 + "\n")
-                outfile.write(" " * 10 + "codeBASED COMPILATION ARCHIVE\n")
-                outfile.write("=" * 70 + "\n\n")
-                outfile.write(f"// Source Directory: {self.current_folder}\n")
-                outfile.write(f"// Output File: {full_output_path}\n")
-                outfile.write(f"// Total Files: {total_files}\n")
-                outfile.write(f"// Compiled on: {time.strftime('%Y-%m-%d at %H:%M:%S')}\n")
-                outfile.write("=" * 70 + "\n\n")
-
-                for file_path in files:
+            # Paths are absolute strings under the root, so slicing off the
+            # root prefix gives the relative path without building Path objects
+            root_prefix_len = len(os.path.join(str(self.current_folder), ''))
+            # Output size, counted as it is written rather than stat'ed after
+            bytes_written = 0
+
+            with GatherWriter(full_output_path) as outfile, \
+                    ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+                # Write header with custom colors in comments, as one block
+                bytes_written += outfile.write((
+                    f"{RULE}\n"
+                    f"{TITLE_INDENT}codeBASED COMPILATION ARCHIVE\n"
+                    f"{RULE}\n\n"
+                    f"// Source Directory: {self.current_folder}\n"
+                    f"// Output File: {full_output_path}\n"
+                    f"// Total Files: {total_files}\n"
+                    f"// Compiled on: {time.strftime('%Y-%m-%d at %H:%M:%S')}\n"
+                    f"{RULE}\n\n"
+                ).encode('utf-8'))
+
+                # Report progress every `progress_step` files, plus the last one
+                progress_step = max(1, total_files // PROGRESS_UPDATES)
+                next_progress = min(progress_step, total_files)
+                percent_per_file = 100.0 / total_files
+
+                # Keep a sliding window of reads in flight ahead of the writer;
+                # results are consumed in submission order, so output order holds
+                read_source_file = self._read_source_file
+                pending = deque(pool.submit(read_source_file, file_path, size, mtime)
+                                for file_path, size, mtime in files[:READ_AHEAD_FILES])
+
+                for index, (file_path, _, _) in enumerate(files):
+                    if index + READ_AHEAD_FILES < total_files:
+                        pending.append(pool.submit(read_source_file,
+                                                   *files[index + READ_AHEAD_FILES]))
+                    source = pending.popleft()
                     processed += 1
-                    relative_path = file_path.relative_to(self.current_folder)
+                    relative_path = file_path[root_prefix_len:]
 
-                    # Update progress
-                    progress = (processed / total_files) * 100
-                    self.queue.put(('progress', progress))
-                    self.queue.put(('status', f"Processing {processed}/{total_files}: {relative_path}"))
+                    # Update progress, as one combined message; the status text
+                    # is only formatted for the updates actually sent
+                    if processed == next_progress:
+                        next_progress = min(next_progress + progress_step, total_files)
+                        self.post_message('progress_status', (
+                            processed * percent_per_file,
+                            f"Processing {processed}/{total_files}: {relative_path}"))
 
                     try:
-                        # Read file content
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as infile:
-                            content = infile.read()
-                        
-                        # Get file stats
-                        stats = file_path.stat()
-                        file_size = self._format_size(stats.st_size)
-                        mod_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_mtime))
+                        # Read errors surface here, from the worker
+                        size, mtime, line_count, data = source.result()
+                        file_size = self._format_size(size)
+                        mod_time = self._format_mtime(int(mtime))
                         
                         # Write file header
-                        outfile.write("// " + "=" * 67 + "\n")
-                        outfile.write(f"// FILE: {relative_path}\n")
-                        outfile.write(f"// Path: {file_path}\n")
-                        outfile.write(f"// Size: {file_size}\n")
-                        outfile.write(f"// Last Modified: {mod_time}\n")
-                        outfile.write(f"// Lines: {len(content.splitlines())}\n")
-                        outfile.write("// " + "=" * 67 + "\n\n")
+                        bytes_written += outfile.write((
+                            f"{FILE_RULE}\n"
+                            f"// FILE: {relative_path}\n"
+                            f"// Path: {file_path}\n"
+                            f"// Size: {file_size}\n"
+                            f"// Last Modified: {mod_time}\n"
+                            f"// Lines: {line_count}\n"
+                            f"{FILE_RULE}\n\n"
+                        ).encode('utf-8'))
                         
-                        # Write content
-                        outfile.write(content)
+                        # Write content, as raw bytes that are never decoded
+                        if data is None:
+                            with open(file_path, 'rb', buffering=0) as infile:
+                                bytes_written += self._copy_file_contents(infile, outfile, size)
+                        else:
+                            bytes_written += outfile.write(data)
                         
                         # Add spacing between files
-                        outfile.write("\n\n")
+                        bytes_written += outfile.write(FILE_GAP)
 
                     except Exception as e:
                         error_msg = f"Error reading {relative_path}: {str(e)}"
                         errors.append(error_msg)
-                        outfile.write(f"// ERROR: {error_msg}\n\n")
-
-                # Write footer
-                outfile.write("=" * 70 + "\n")
-                outfile.write(" " * 10 + "COMPILATION COMPLETE\n")
-                outfile.write("=" * 70 + "\n\n")
-                outfile.write(f"// Summary:\n")
-                outfile.write(f"//   Successfully processed: {total_files - len(errors)} files\n")
-                outfile.write(f"//   Errors encountered: {len(errors)} files\n")
-                outfile.write(f"//   Total size: {self._format_size(os.path.getsize(full_output_path))}\n")
-                outfile.write(f"//   Completed at: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+                        bytes_written += outfile.write(
+                            f"// ERROR: {error_msg}\n\n".encode('utf-8'))
+
+                # Write footer and error list as one block
+                footer = [
+                    f"{RULE}\n"
+                    f"{TITLE_INDENT}COMPILATION COMPLETE\n"
+                    f"{RULE}\n\n"
+                    f"// Summary:\n"
+                    f"//   Successfully processed: {total_files - len(errors)} files\n"
+                    f"//   Errors encountered: {len(errors)} files\n"
+                    f"//   Total size: {self._format_size(bytes_written)}\n"
+                    f"//   Completed at: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+                ]
                 
                 if errors:
-                    outfile.write("\n// " + "!" * 67 + "\n")
-                    outfile.write("// ERRORS ENCOUNTERED:\n")
-                    for error in errors[:10]:
-                        outfile.write(f"//   • {error}\n")
+                    footer.append(f"\n{ERROR_RULE}\n// ERRORS ENCOUNTERED:\n")
+                    footer.extend([f"//   • {error}\n" for error in errors[:10]])
                     if len(errors) > 10:
-                        outfile.write(f"//   ... and {len(errors) - 10} more errors\n")
+                        footer.append(f"//   ... and {len(errors) - 10} more errors\n")
+                bytes_written += outfile.write("".join(footer).encode('utf-8'))
 
             # Final status update
             if errors:
-                self.queue.put(('error', f"Completed with {len(errors)} errors"))
+                self.post_message('error', f"Completed with {len(errors)} errors")
                 self.root.after(0, lambda: self.show_warning_dialog(
                     "Compilation Complete",
                     f"Compilation finished with {len(errors)} errors.",
@@ -1622,9 +2354,8 @@ class CodebaseCompilerApp:
                     f"Check the output file for details."
                 ))
             else:
-                self.queue.put(('success', f"Successfully compiled {total_files} files"))
-                file_size = os.path.getsize(full_output_path)
-                size_str = self._format_size(file_size)
+                self.post_message('success', f"Successfully compiled {total_files} files")
+                size_str = self._format_size(bytes_written)
                 self.root.after(0, lambda: self.show_info_dialog(
                     "Success!",
                     f"Compilation completed successfully!\n\n"
@@ -1635,13 +2366,13 @@ class CodebaseCompilerApp:
                 ))
 
         except Exception as e:
-            self.queue.put(('error', f"Compilation failed: {str(e)}"))
+            self.post_message('error', f"Compilation failed: {str(e)}")
             self.root.after(0, lambda: self.show_error_dialog(
                 "Error",
                 f"Compilation failed:\n\n{str(e)}"
             ))
         finally:
-            self.queue.put(('progress_complete', None))
+            self.post_message('progress_complete', None)
 
     # Custom dialog helper methods
     def show_info_dialog(self, title, message, details=None):
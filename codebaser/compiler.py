@@ -1,107 +1,395 @@
 #!/usr/bin/env python3
 """Compilation engine - aggregates selected files into a single output file."""
+import errno
 import os
+import sys
+import tempfile
 import time
+import shutil
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Tuple, Optional, Callable
 
 from scanner import format_size
 
+# Decorative rules used in the compiled output
+RULE = "=" * 70
+FILE_RULE = "// " + "=" * 67
+ERROR_RULE = "// " + "!" * 67
+TITLE_INDENT = " " * 10
+FILE_GAP = b"\n\n"  # Written after every file's contents
 
-def write_header(outfile, source_root: Path, total_files: int):
-    """Write the compilation header."""
-    outfile.write("=" * 70 + "\n")
-    outfile.write(" " * 10 + "codeBASED COMPILATION ARCHIVE\n")
-    outfile.write("=" * 70 + "\n\n")
-    outfile.write(f"// Source Directory: {source_root}\n")
-    outfile.write(f"// Total Files: {total_files}\n")
-    outfile.write(f"// Compiled on: {time.strftime('%Y-%m-%d at %H:%M:%S')}\n")
-    outfile.write("=" * 70 + "\n\n")
+# Chunk size for streaming file contents into the compiled output
+COPY_CHUNK_SIZE = 1 << 20
 
+# Files at least this large are streamed into the output; smaller ones
+# are read whole and queued for a gathered write
+LARGE_FILE_SIZE = 1 << 20
 
-def write_file_section(outfile, file_path: Path, relative_path: Path) -> Optional[str]:
+# Queued output is flushed with one writev() once it reaches either limit
+# (1024 is IOV_MAX on Linux and macOS)
+WRITEV_MAX_BYTES = 4 << 20
+WRITEV_MAX_ENTRIES = 1024
+USE_WRITEV = hasattr(os, 'writev')
+
+# The output is written to a uniquely named temp file with this suffix next
+# to its destination and renamed over it once complete, so a failed run never
+# leaves a partial file or touches anything else
+TEMP_SUFFIX = ".tmp"
+
+# Permissions the output gets, as for any new file; the temp file it is
+# written under starts out owner-only
+_umask = os.umask(0)
+os.umask(_umask)
+OUTPUT_FILE_MODE = 0o666 & ~_umask
+
+# How many files ahead of the writer are read in the background, and by
+# how many threads (reads release the GIL)
+READ_AHEAD_FILES = 32
+READ_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+# Compile progress is reported about this many times per run
+PROGRESS_UPDATES = 200
+
+# In-kernel copies to try in order, each called as
+# (in_fd, out_fd, offset, count) -> bytes copied. copy_file_range() skips
+# the page-cache round trip (and can share extents on CoW filesystems);
+# sendfile() also works across filesystems. Both can target a regular
+# file only on Linux.
+KERNEL_COPIES = []
+if sys.platform.startswith('linux'):
+    if hasattr(os, 'copy_file_range'):
+        KERNEL_COPIES.append(
+            lambda in_fd, out_fd, offset, count: os.copy_file_range(in_fd, out_fd, count, offset))
+    if hasattr(os, 'sendfile'):
+        KERNEL_COPIES.append(
+            lambda in_fd, out_fd, offset, count: os.sendfile(out_fd, in_fd, offset, count))
+
+# Errors meaning a kernel copy can't be used between two files
+KERNEL_COPY_UNSUPPORTED = frozenset((errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                                     errno.EOPNOTSUPP, errno.EBADF))
+
+# Page-cache hints (None where posix_fadvise() is unavailable): large
+# sources are read front to back once, and the finished output is not
+# read back by us
+FADVISE_SEQUENTIAL = getattr(os, 'POSIX_FADV_SEQUENTIAL', None)
+FADVISE_DONTNEED = getattr(os, 'POSIX_FADV_DONTNEED', None)
+
+
+class GatherWriter:
+    """Binary output file that queues writes and sends them with one writev().
+
+    Written bytes are kept by reference rather than copied into a buffer,
+    so callers must not mutate them afterwards.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory, name = os.path.split(path)
+        self._fd, self._temp_path = tempfile.mkstemp(
+            suffix=TEMP_SUFFIX, prefix=name + '.', dir=directory or os.curdir)
+        if hasattr(os, 'fchmod'):
+            os.fchmod(self._fd, OUTPUT_FILE_MODE)
+        self._pending = []
+        self._pending_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Only a complete output replaces the destination
+        try:
+            self.close()
+        except BaseException:
+            self._discard()
+            raise
+        if exc_type is None:
+            os.replace(self._temp_path, self.path)
+        else:
+            self._discard()
+
+    def _discard(self):
+        try:
+            os.unlink(self._temp_path)
+        except OSError:
+            pass
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def write(self, data: bytes) -> int:
+        size = len(data)
+        if size:
+            self._pending.append(data)
+            self._pending_bytes += size
+            if self._pending_bytes >= WRITEV_MAX_BYTES or len(self._pending) >= WRITEV_MAX_ENTRIES:
+                self.flush()
+        return size
+
+    def flush(self):
+        pending = self._pending
+        if not pending:
+            return
+        written = os.writev(self._fd, pending) if USE_WRITEV else 0
+        if written < self._pending_bytes:
+            # Short write (rare for regular files) or no writev(): finish plainly
+            rest = memoryview(b"".join(pending))[written:]
+            while rest:
+                rest = rest[os.write(self._fd, rest):]
+        self._pending = []
+        self._pending_bytes = 0
+
+    def close(self):
+        if self._fd < 0:
+            return
+        try:
+            self.flush()
+            if FADVISE_DONTNEED is not None:
+                # Start writeback and let the pages go, rather than have the
+                # archive push other files out of the cache
+                os.posix_fadvise(self._fd, 0, 0, FADVISE_DONTNEED)
+        finally:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def write_header(outfile, source_root: Path, total_files: int) -> int:
+    """Write the compilation header. Returns the number of bytes written."""
+    return outfile.write((
+        f"{RULE}\n"
+        f"{TITLE_INDENT}codeBASED COMPILATION ARCHIVE\n"
+        f"{RULE}\n\n"
+        f"// Source Directory: {source_root}\n"
+        f"// Total Files: {total_files}\n"
+        f"// Compiled on: {time.strftime('%Y-%m-%d at %H:%M:%S')}\n"
+        f"{RULE}\n\n"
+    ).encode('utf-8'))
+
+
+@lru_cache(maxsize=4096)
+def format_mtime(mtime: int) -> str:
+    """Format whole-second mtimes; files checked out together share them."""
+    # Same as strftime("%Y-%m-%d %H:%M:%S") without parsing a format
+    lt = time.localtime(mtime)
+    return (f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} "
+            f"{lt.tm_hour:02d}:{lt.tm_min:02d}:{lt.tm_sec:02d}")
+
+
+def count_lines(infile) -> int:
+    """Count lines in a binary file, a final line without newline included."""
+    if FADVISE_SEQUENTIAL is not None:
+        # Only large files get here; let the kernel read further ahead
+        os.posix_fadvise(infile.fileno(), 0, 0, FADVISE_SEQUENTIAL)
+    # Read into one reused buffer and count in place, so no bytes object
+    # is allocated per chunk
+    buffer = bytearray(COPY_CHUNK_SIZE)
+    readinto = infile.readinto
+    line_count = 0
+    last_byte = 0x0A
+    while True:
+        length = readinto(buffer)
+        if not length:
+            break
+        line_count += buffer.count(b"\n", 0, length)
+        last_byte = buffer[length - 1]
+    if last_byte != 0x0A:
+        line_count += 1  # Final line without a newline
+    return line_count
+
+
+def read_source_file(file_path: str, size: Optional[int], mtime: Optional[float]):
+    """
+    Line-count a file for compiling; small files are read whole.
+    `size` and `mtime` come from the directory scan, or are None if it
+    never stat'ed the file.
+    Returns (size, mtime, line_count, data); data is None for files too
+    large to hold in memory, which the writer streams instead.
+    """
+    # Unbuffered: read() of the whole file is then a single sized read
+    # straight into the result, as Path.read_bytes() does
+    with open(file_path, 'rb', buffering=0) as infile:
+        if size is None or size >= LARGE_FILE_SIZE:
+            # Unknown, or large enough that the exact size drives the copy
+            stats = os.fstat(infile.fileno())
+            size, mtime = stats.st_size, stats.st_mtime
+            if size >= LARGE_FILE_SIZE:
+                return size, mtime, count_lines(infile), None
+        # Read at most one byte past the known size, so memory stays bounded
+        # even if the file has grown since it was stat'ed
+        data = infile.read(size + 1)
+        if len(data) > size:
+            # It grew: stream it like a large file instead
+            stats = os.fstat(infile.fileno())
+            infile.seek(0)
+            return stats.st_size, stats.st_mtime, count_lines(infile), None
+    line_count = data.count(b"\n")
+    if data and not data.endswith(b"\n"):
+        line_count += 1
+    # The length read is exact even if the file changed since the scan
+    return len(data), mtime, line_count, data
+
+
+def copy_in_kernel(in_fd: int, out_fd: int, size: int) -> Optional[int]:
+    """
+    Copy a file's bytes to the output without passing them through Python.
+    Returns the number of bytes copied, or None if no kernel copy works
+    between these two files.
+    """
+    for kernel_copy in KERNEL_COPIES:
+        offset = 0
+        try:
+            while offset < size:
+                copied = kernel_copy(in_fd, out_fd, offset, size - offset)
+                if copied == 0:
+                    break  # File shrank while we were copying
+                offset += copied
+            if offset:
+                return offset
+            # Some filesystems report 0 bytes rather than an error, so
+            # an empty first copy means try the next method
+        except OSError as e:
+            # Only fall back before anything was copied
+            if offset or e.errno not in KERNEL_COPY_UNSUPPORTED:
+                raise
+    return None
+
+
+def copy_file_contents(infile, outfile, size: int) -> int:
+    """
+    Append a file's bytes to the output, in the kernel where possible.
+    Returns the number of bytes copied.
+    """
+    if FADVISE_SEQUENTIAL is not None:
+        os.posix_fadvise(infile.fileno(), 0, 0, FADVISE_SEQUENTIAL)
+    # Flushing for a kernel copy only pays off for large files; smaller
+    # ones are cheaper to queue with the rest of the output
+    if KERNEL_COPIES and size >= LARGE_FILE_SIZE:
+        # Anything still queued must land before the kernel appends
+        outfile.flush()
+        copied = copy_in_kernel(infile.fileno(), outfile.fileno(), size)
+        if copied is not None:
+            return copied
+    shutil.copyfileobj(infile, outfile, COPY_CHUNK_SIZE)
+    return infile.tell()
+
+
+def write_file_section(outfile, file_path: str, relative_path: str,
+                       source: Future) -> Tuple[int, Optional[str]]:
     """
     Write a single file's content to the output.
-    Returns error message if failed, else None.
+    `source` is the pending read_source_file() result for the file.
+    Returns (bytes_written, error message if failed, else None).
     """
+    written = 0
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as infile:
-            content = infile.read()
-        
-        stats = file_path.stat()
-        file_size = format_size(stats.st_size)
-        mod_time = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(stats.st_mtime))
+        size, mtime, line_count, data = source.result()
+        file_size = format_size(size)
+        mod_time = format_mtime(int(mtime))
         
-        outfile.write("// " + "=" * 67 + "\n")
-        outfile.write(f"// FILE: {relative_path}\n")
-        outfile.write(f"// Path: {file_path}\n")
-        outfile.write(f"// Size: {file_size}\n")
-        outfile.write(f"// Last Modified: {mod_time}\n")
-        outfile.write(f"// Lines: {len(content.splitlines())}\n")
-        outfile.write("// " + "=" * 67 + "\n\n")
-        outfile.write(content)
-        outfile.write("\n\n")
-        return None
+        written += outfile.write((
+            f"{FILE_RULE}\n"
+            f"// FILE: {relative_path}\n"
+            f"// Path: {file_path}\n"
+            f"// Size: {file_size}\n"
+            f"// Last Modified: {mod_time}\n"
+            f"// Lines: {line_count}\n"
+            f"{FILE_RULE}\n\n"
+        ).encode('utf-8'))
+        # Contents are copied as raw bytes, never decoded
+        if data is None:
+            with open(file_path, 'rb', buffering=0) as infile:
+                written += copy_file_contents(infile, outfile, size)
+        else:
+            written += outfile.write(data)
+        written += outfile.write(FILE_GAP)
+        return written, None
     except Exception as e:
-        return f"Error reading {relative_path}: {str(e)}"
+        return written, f"Error reading {relative_path}: {str(e)}"
 
 
-def write_footer(outfile, success_count: int, error_count: int, output_path: str):
-    """Write compilation footer and summary."""
-    outfile.write("=" * 70 + "\n")
-    outfile.write(" " * 10 + "COMPILATION COMPLETE\n")
-    outfile.write("=" * 70 + "\n\n")
-    outfile.write(f"// Summary:\n")
-    outfile.write(f"//   Successfully processed: {success_count} files\n")
-    outfile.write(f"//   Errors encountered: {error_count} files\n")
-    outfile.write(f"//   Total size: {format_size(os.path.getsize(output_path))}\n")
-    outfile.write(f"//   Completed at: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
+def write_footer(outfile, success_count: int, error_count: int, total_size: int) -> int:
+    """
+    Write compilation footer and summary, `total_size` being the bytes
+    written so far. Returns the number of bytes written.
+    """
+    return outfile.write((
+        f"{RULE}\n"
+        f"{TITLE_INDENT}COMPILATION COMPLETE\n"
+        f"{RULE}\n\n"
+        f"// Summary:\n"
+        f"//   Successfully processed: {success_count} files\n"
+        f"//   Errors encountered: {error_count} files\n"
+        f"//   Total size: {format_size(total_size)}\n"
+        f"//   Completed at: {time.strftime('%Y-%m-%d %H:%M:%S')}\n"
+    ).encode('utf-8'))
 
 
 def compile_files(
-    file_paths: List[Path],
+    files: List[Tuple[str, Optional[int], Optional[float]]],
     output_path: str,
     source_root: Path,
     progress_callback: Optional[Callable[[int, int, str], None]] = None
-) -> Tuple[int, List[str]]:
+) -> Tuple[int, List[str], int]:
     """
     Compile a list of files into a single output file.
     
     Args:
-        file_paths: List of Path objects to compile.
+        files: (absolute path, size, mtime) per file to compile; size and
+            mtime may be None when the scan has no stat for the file.
         output_path: Destination file path.
         source_root: Root directory for relative path display.
-        progress_callback: Function called with (current, total, relative_path).
+        progress_callback: Function called with (current, total, relative_path),
+            about PROGRESS_UPDATES times per run and for the last file.
     
     Returns:
-        Tuple (success_count, list_of_error_messages)
+        Tuple (success_count, list_of_error_messages, output_size_in_bytes)
     """
-    total_files = len(file_paths)
+    total_files = len(files)
     processed = 0
     errors = []
+    # Paths are absolute strings under the root, so the relative path is a slice
+    root_prefix_len = len(os.path.join(str(source_root), ''))
+    progress_step = max(1, total_files // PROGRESS_UPDATES)
+    next_progress = min(progress_step, total_files)
+    # Output size, counted as it is written rather than stat'ed after
+    bytes_written = 0
     
-    with open(output_path, 'w', encoding='utf-8') as outfile:
-        write_header(outfile, source_root, total_files)
+    with GatherWriter(output_path) as outfile, \
+            ThreadPoolExecutor(max_workers=READ_WORKERS) as pool:
+        bytes_written += write_header(outfile, source_root, total_files)
+        
+        # Keep a sliding window of reads in flight ahead of the writer;
+        # results are consumed in submission order, so output order holds
+        pending = deque(pool.submit(read_source_file, file_path, size, mtime)
+                        for file_path, size, mtime in files[:READ_AHEAD_FILES])
         
-        for file_path in file_paths:
-            relative_path = file_path.relative_to(source_root)
-            if progress_callback:
-                progress_callback(processed + 1, total_files, str(relative_path))
+        for index, (file_path, _, _) in enumerate(files):
+            if index + READ_AHEAD_FILES < total_files:
+                pending.append(pool.submit(read_source_file,
+                                           *files[index + READ_AHEAD_FILES]))
+            relative_path = file_path[root_prefix_len:]
+            if processed + 1 == next_progress:
+                next_progress = min(next_progress + progress_step, total_files)
+                if progress_callback:
+                    progress_callback(processed + 1, total_files, relative_path)
             
-            error = write_file_section(outfile, file_path, relative_path)
+            written, error = write_file_section(outfile, file_path, relative_path,
+                                                pending.popleft())
+            bytes_written += written
             if error:
                 errors.append(error)
-                outfile.write(f"// ERROR: {error}\n\n")
+                bytes_written += outfile.write(f"// ERROR: {error}\n\n".encode('utf-8'))
             processed += 1
         
-        write_footer(outfile, processed - len(errors), len(errors), output_path)
+        bytes_written += write_footer(outfile, processed - len(errors), len(errors), bytes_written)
         
         if errors:
-            outfile.write("\n// " + "!" * 67 + "\n")
-            outfile.write("// ERRORS ENCOUNTERED:\n")
-            for err in errors[:10]:
-                outfile.write(f"//   • {err}\n")
+            error_lines = [f"\n{ERROR_RULE}\n// ERRORS ENCOUNTERED:\n"]
+            error_lines.extend([f"//   • {err}\n" for err in errors[:10]])
             if len(errors) > 10:
-                outfile.write(f"//   ... and {len(errors) - 10} more errors\n")
+                error_lines.append(f"//   ... and {len(errors) - 10} more errors\n")
+            bytes_written += outfile.write("".join(error_lines).encode('utf-8'))
     
-    return processed - len(errors), errors
\ No newline at end of file
+    return processed - len(errors), errors, bytes_written
\ No newline at end of file
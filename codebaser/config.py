@@ -20,9 +20,30 @@ COLORS = {
 # Default output filename
 DEFAULT_OUTPUT_FILENAME = "codebase.txt"
 
+# Maximum number of tree rows (or other queued worker messages) handled
+# per UI tick; workers post rows in batches of this size
+QUEUE_BATCH_SIZE = 200
+
+# Queued messages about a tree load; each carries (load generation, data)
+# so the controller can drop those left over from an earlier load
+LOAD_MESSAGES = frozenset({'add_items', 'loading_progress', 'loading_complete',
+                           'loading_cancelled', 'loading_error'})
+
+# Initial tree tags keyed by (odd row, is directory)
+ROW_TAGS = {
+    (False, False): ("unchecked", "evenrow", "file"),
+    (True, False): ("unchecked", "oddrow", "file"),
+    (False, True): ("unchecked", "evenrow", "folder"),
+    (True, True): ("unchecked", "oddrow", "folder"),
+}
+
 # Skip hidden files/folders (starting with '.')
 EXCLUDED_PREFIXES = ()
 
+# Names always skipped: caches and dependency trees that would swamp the listing
+EXCLUDED_NAMES = frozenset({'__pycache__', 'node_modules', 'venv', '.git', '.venv',
+                            '.mypy_cache', '.pytest_cache'})
+
 # File extension to emoji mapping
 ICON_MAP = {
     '.py': '🐍', '.js': '📜', '.jsx': '⚛️', '.ts': '📘', '.tsx': '⚛️',
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 """Application controller – orchestrates UI, scanner, and compiler."""
+import itertools
 import os
-import threading
 import queue
+import threading
+import traceback
+from collections import deque
+import tkinter as tk
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Tuple
 
-from config import COLORS, DEFAULT_OUTPUT_FILENAME
+from config import COLORS, DEFAULT_OUTPUT_FILENAME, LOAD_MESSAGES, QUEUE_BATCH_SIZE, ROW_TAGS
 from scanner import DirectoryScanner, format_size
 from compiler import compile_files
 from dialogs import InfoDialog, WarningDialog, ErrorDialog, ConfirmDialog
@@ -16,12 +20,28 @@ class CodebaseController:
     def __init__(self, ui):
         self.ui = ui
         self.current_folder = None
-        self.file_items: Dict[str, Any] = {}
+        self.item_paths: Dict[str, str] = {}
+        self.item_is_dir: Dict[str, bool] = {}
+        # File item id -> (size, mtime) from the scan, so compiling skips a stat
+        self.item_stats: Dict[str, Tuple[int, float]] = {}
         self.loading_thread = None
         self.stop_loading_flag = False
         self.is_loading = False
-        self.queue = queue.Queue()
+        # Bumped by each load, so messages from an older one are dropped
+        self._load_generation = 0
+        # Tree item ids are sequential numbers, unique for the app's lifetime,
+        # so rows from an earlier scan can never collide with a newer one's
+        self._next_item_id = itertools.count(1).__next__
+        # Compilations run in order on one long-lived worker, so compiling
+        # again doesn't start a new thread each time
+        self._jobs = queue.SimpleQueue()
+        threading.Thread(target=self._run_jobs, daemon=True).start()
+        # A bare deque: append() and popleft() are atomic, and with a single
+        # consumer no lock or condition variable is needed
+        self.queue = deque()
         self._queue_processing_started = False
+        # Whether a <<QueueReady>> wakeup is already on its way to _process_queue
+        self._queue_wakeup_pending = False
         
         if self.ui is not None:
             self._start_queue_processor()
@@ -34,7 +54,24 @@ class CodebaseController:
     
     def _start_queue_processor(self):
         self._queue_processing_started = True
-        self.ui.root.after(100, self._process_queue)
+        # Drain the queue when a worker posts to it, rather than polling
+        self.ui.root.bind('<<QueueReady>>', lambda event: self._process_queue())
+        # Pick up anything posted before the UI existed
+        self.ui.root.after_idle(self._process_queue)
+    
+    def post_message(self, msg_type, data):
+        """Queue a message for the UI and wake _process_queue if needed."""
+        self.queue.append((msg_type, data))
+        if self._queue_processing_started and not self._queue_wakeup_pending:
+            self._queue_wakeup_pending = True
+            try:
+                # Tkinter hands a worker thread's call over to the main loop
+                # and blocks the worker until the main loop has run it. The
+                # pending flag limits that wait to once per queue drain.
+                self.ui.root.event_generate('<<QueueReady>>', when='tail')
+            except (tk.TclError, RuntimeError):
+                # Window is closing; let a later post try again
+                self._queue_wakeup_pending = False
     
     # --- Event handlers called by UI ---
     def select_folder(self):
@@ -74,7 +111,7 @@ class CodebaseController:
         if self.is_loading:
             self.stop_loading_flag = True
             self.is_loading = False
-            self.queue.put(('loading_cancelled', None))
+            self.post_message('loading_cancelled', (self._load_generation, None))
             self.ui.show_normal_state()
             self.ui.set_buttons_state(True)
             self.ui.set_status("Loading cancelled")
@@ -93,9 +130,13 @@ class CodebaseController:
             return
         
         checked_items = self.ui.get_checked_items()
-        selected_files = [self.file_items[item_id]['path']
+        item_paths = self.item_paths
+        item_is_dir = self.item_is_dir
+        item_stats = self.item_stats
+        # (path, size, mtime) per file; size and mtime are None if never stat'ed
+        selected_files = [(item_paths[item_id],) + item_stats.get(item_id, (None, None))
                           for item_id in checked_items
-                          if not self.file_items[item_id]['is_dir']]
+                          if not item_is_dir[item_id]]
         
         if not selected_files:
             self._show_warning("No Files Selected", "Please select at least one file to compile.")
@@ -119,9 +160,7 @@ class CodebaseController:
             return
         
         self.ui.show_progress(0)
-        threading.Thread(target=self._compile_thread,
-                         args=(selected_files, full_output_path),
-                         daemon=True).start()
+        self._jobs.put((self._compile_thread, (selected_files, full_output_path)))
     
     def on_closing(self):
         self.cancel_loading()
@@ -134,100 +173,147 @@ class CodebaseController:
             return
         
         self.ui.clear_tree()
-        self.file_items.clear()
+        self.ui.begin_tree_update()
+        self.item_paths.clear()
+        self.item_is_dir.clear()
+        self.item_stats.clear()
         self.ui.show_loading_state("Scanning directory...")
         self.is_loading = True
         self.stop_loading_flag = False
+        self._load_generation += 1
         self.ui.set_buttons_state(False)
         
-        self.loading_thread = threading.Thread(target=self._scan_thread, daemon=True)
+        self.loading_thread = threading.Thread(target=self._scan_thread,
+                                               args=(self._load_generation,), daemon=True)
         self.loading_thread.start()
     
-    def _scan_thread(self):
-        scanner = DirectoryScanner(self.current_folder, stop_flag=lambda: self.stop_loading_flag)
-        result = scanner.scan(progress_callback=lambda msg: self.queue.put(('loading_progress', msg)))
+    def _scan_thread(self, generation):
+        def is_stale():
+            # Cancelled, or replaced by a newer load
+            return self.stop_loading_flag or generation != self._load_generation
+        
+        scanner = DirectoryScanner(self.current_folder, stop_flag=is_stale,
+                                   next_item_id=self._next_item_id)
+        result = scanner.scan(
+            progress_callback=lambda msg: self.post_message('loading_progress', (generation, msg)))
         
         if result.get('cancelled', False):
-            self.queue.put(('loading_cancelled', None))
+            self.post_message('loading_cancelled', (generation, None))
             return
         
-        items_data = result['items']
-        row_index = 0
-        for item_id, info in items_data.items():
-            self.file_items[item_id] = {
-                'path': info['path'],
-                'is_dir': info['is_dir'],
-                'relative_path': info['relative_path']
-            }
-            row_tag = 'evenrow' if row_index % 2 == 0 else 'oddrow'
-            row_index += 1
-            self.queue.put(('add_item', {
-                'item_id': item_id,
-                'parent_id': info['parent_id'],
-                'text': info['text'],
-                'values': info['values'],
-                'tags': ("unchecked", row_tag, 'folder' if info['is_dir'] else 'file')
-            }))
+        post = self.post_message
+        # Rows go to the UI in batches, one queue message each, as
+        # (item_id, parent_id, text, values, tags, path, is_dir, stat) tuples;
+        # the item maps are filled in as they are added, on the UI thread
+        batch = []
+        for row_index, (item_id, info) in enumerate(result['items'].items()):
+            is_dir = info['is_dir']
+            batch.append((item_id, info['parent_id'], info['text'], info['values'],
+                          ROW_TAGS[(row_index & 1 == 1, is_dir)],
+                          info['path'], is_dir, info['stat']))
+            if len(batch) == QUEUE_BATCH_SIZE:
+                if is_stale():
+                    return
+                post('add_items', (generation, batch))
+                batch = []
+        if batch:
+            post('add_items', (generation, batch))
         
-        self.queue.put(('loading_complete', {
+        self.post_message('loading_complete', (generation, {
             'total_folders': result['total_folders'],
             'total_files': result['total_files']
         }))
     
+    def _run_jobs(self):
+        """Worker loop running queued (function, args) jobs one at a time."""
+        while True:
+            function, args = self._jobs.get()
+            try:
+                function(*args)
+            except Exception:
+                # Keep the worker alive for the next job
+                traceback.print_exc()
+    
     def _compile_thread(self, files, output_path):
         def progress_callback(current, total, rel_path):
             percent = (current / total) * 100
-            self.queue.put(('progress', percent))
-            self.queue.put(('status', f"Processing {current}/{total}: {rel_path}"))
+            self.post_message('progress_status',
+                              (percent, f"Processing {current}/{total}: {rel_path}"))
         
-        success_count, errors = compile_files(files, output_path, self.current_folder, progress_callback)
+        success_count, errors, output_size = compile_files(
+            files, output_path, self.current_folder, progress_callback)
         
         if errors:
-            self.queue.put(('error', f"Completed with {len(errors)} errors"))
+            self.post_message('error', f"Completed with {len(errors)} errors")
             self.ui.root.after(0, lambda: self._show_warning(
                 "Compilation Complete",
                 f"Compilation finished with {len(errors)} errors.",
                 f"Output: {output_path}\nFiles processed: {len(files)}\nErrors: {len(errors)}"
             ))
         else:
-            self.queue.put(('success', f"Successfully compiled {success_count} files"))
-            size_str = format_size(os.path.getsize(output_path))
+            self.post_message('success', f"Successfully compiled {success_count} files")
+            size_str = format_size(output_size)
             self.ui.root.after(0, lambda: self._show_info(
                 "Success!",
                 f"Compilation completed successfully!\n\nOutput file: {output_path}\n"
                 f"Files compiled: {success_count}\nOutput size: {size_str}",
                 "Your codebase is ready for review!"
             ))
-        self.queue.put(('progress_complete', None))
+        self.post_message('progress_complete', None)
     
     def _process_queue(self):
+        # Cleared before draining, so anything posted from here on wakes us again
+        self._queue_wakeup_pending = False
+        load_generation = self._load_generation
         try:
-            while True:
-                msg_type, data = self.queue.get_nowait()
+            # Bound the work per tick so a large load never blocks the UI
+            popleft = self.queue.popleft
+            budget = QUEUE_BATCH_SIZE
+            while budget > 0:
+                msg_type, data = popleft()
+                budget -= 1
+                if msg_type in LOAD_MESSAGES:
+                    generation, data = data
+                    if generation != load_generation:
+                        continue  # From a load that was cancelled or replaced
                 
-                if msg_type == 'add_item':
-                    self.ui.add_tree_item(
-                        item_id=data['item_id'],
-                        parent_id=data['parent_id'],
-                        text=data['text'],
-                        values=data['values'],
-                        tags=data['tags']
-                    )
+                if msg_type == 'add_items':
+                    # Each row in the batch counts against this tick's budget
+                    add_tree_item = self.ui.add_tree_item
+                    item_paths = self.item_paths
+                    item_is_dir = self.item_is_dir
+                    item_stats = self.item_stats
+                    for item_id, parent_id, text, values, tags, path, is_dir, stat in data:
+                        item_paths[item_id] = path
+                        item_is_dir[item_id] = is_dir
+                        if stat is not None:
+                            item_stats[item_id] = stat
+                        add_tree_item(
+                            item_id=item_id,
+                            parent_id=parent_id,
+                            text=text,
+                            values=values,
+                            tags=tags
+                        )
+                    budget -= len(data) - 1
                 elif msg_type == 'loading_progress':
                     self.ui.set_status(data)
                 elif msg_type == 'loading_complete':
                     self.is_loading = False
+                    self.ui.end_tree_update()
                     self.ui.show_normal_state()
                     self.ui.set_buttons_state(True)
                     self.ui.set_file_count(data['total_folders'], data['total_files'])
                     self.ui.set_status(f"Loaded folder: {self.current_folder.name}")
                 elif msg_type == 'loading_cancelled':
                     self.is_loading = False
+                    self.ui.end_tree_update()
                     self.ui.show_normal_state()
                     self.ui.set_buttons_state(True)
                     self.ui.set_status("Loading cancelled")
                 elif msg_type == 'loading_error':
                     self.is_loading = False
+                    self.ui.end_tree_update()
                     self.ui.show_normal_state()
                     self.ui.set_buttons_state(True)
                     self.ui.set_status("Error loading folder", is_error=True)
@@ -236,17 +322,24 @@ class CodebaseController:
                     self.ui.set_status(data)
                 elif msg_type == 'progress':
                     self.ui.show_progress(data)
+                elif msg_type == 'progress_status':
+                    # Compile progress: bar position and status text together
+                    percent, status = data
+                    self.ui.show_progress(percent)
+                    self.ui.set_status(status)
                 elif msg_type == 'progress_complete':
                     self.ui.show_progress(100)
                 elif msg_type == 'success':
                     self.ui.set_status(data)
                 elif msg_type == 'error':
                     self.ui.set_status(data, is_error=True)
-        except queue.Empty:
+        except IndexError:  # Queue drained
             pass
         finally:
-            if self.ui:
-                self.ui.root.after(50, self._process_queue)
+            # Come straight back while a backlog remains; otherwise the next
+            # post_message() wakes us
+            if self.ui and self.queue:
+                self.ui.root.after(16, self._process_queue)
     
     # --- Dialog helpers ---
     def _show_info(self, title, message, details=None):
@@ -1,42 +1,145 @@
 #!/usr/bin/env python3
 """File system scanning and tree data generation."""
+import itertools
 import os
+import re
 import time
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional, Callable, Any
 
-from config import ICON_MAP, EXCLUDED_PREFIXES
+from config import ICON_MAP, EXCLUDED_PREFIXES, EXCLUDED_NAMES
+
+# Size units and divisors indexed by (bit_length - 1) // 10
+SIZE_UNITS = (("B", 1), ("KB", 1024), ("MB", 1024 * 1024), ("GB", 1024 * 1024 * 1024))
 
 
 def get_file_icon(filename: str) -> str:
     """Get appropriate emoji icon for file type."""
-    ext = os.path.splitext(filename)[1].lower()
-    return ICON_MAP.get(ext, '📄')
+    dot = filename.rfind('.')
+    if dot <= 0:
+        return '📄'  # No extension, or a dotfile like .bashrc
+    return ICON_MAP.get(filename[dot:].lower(), '📄')
 
 
 def format_size(size_in_bytes: int) -> str:
     """Format file size in human readable format."""
-    if size_in_bytes < 1024:
+    index = min(max(0, size_in_bytes.bit_length() - 1) // 10, 3)
+    if index == 0:
         return f"{size_in_bytes} B"
-    elif size_in_bytes < 1024 * 1024:
-        return f"{size_in_bytes / 1024:.1f} KB"
-    elif size_in_bytes < 1024 * 1024 * 1024:
-        return f"{size_in_bytes / (1024 * 1024):.1f} MB"
-    else:
-        return f"{size_in_bytes / (1024 * 1024 * 1024):.1f} GB"
+    unit, divisor = SIZE_UNITS[index]
+    return f"{size_in_bytes / divisor:.1f} {unit}"
+
+
+def glob_to_regex(pattern: str) -> str:
+    """Translate a gitignore glob into a regex; "*" never crosses a "/"."""
+    parts = []
+    i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')  # Any number of folders, or none
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[' and pattern.find(']', i + 2) > 0:
+            end = pattern.find(']', i + 2)
+            body = pattern[i + 1:end].replace('\\', '\\\\')
+            if body[0] == '!':
+                body = '^' + body[1:]
+            parts.append('[' + body + ']')
+            i = end + 1
+            continue
+        elif c == '\\' and i + 1 < n:
+            parts.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            parts.append(re.escape(c))
+        i += 1
+    return ''.join(parts)
+
+
+def load_ignore_rules(root_path: Path) -> Optional[Callable[[str, bool], bool]]:
+    """
+    Compile the root's .gitignore into an is_ignored(path, is_dir) test.
+    Handles the common subset: comments, * ? [...] and ** globs, a leading
+    or inner "/" anchoring to the root, and a trailing "/" for folders
+    only. Negated ("!") patterns are skipped.
+    Returns None if there is no .gitignore or no usable pattern in it.
+    """
+    try:
+        with open(os.path.join(str(root_path), '.gitignore'), encoding='utf-8',
+                  errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    
+    any_patterns = []
+    dir_patterns = []
+    for line in lines:
+        line = line.rstrip()
+        if not line or line[0] in '#!':
+            continue
+        patterns = any_patterns
+        if line.endswith('/'):
+            line = line.rstrip('/')
+            patterns = dir_patterns
+        # A pattern with a slash is relative to the root; one without
+        # matches the name at any depth
+        anchored = '/' in line
+        line = line.lstrip('/')
+        if line:
+            regex = glob_to_regex(line)
+            patterns.append(regex if anchored else '(?:.*/)?' + regex)
+    if not any_patterns and not dir_patterns:
+        return None
+    
+    # All patterns go into one alternation, compiled once per scan
+    match_any = match_dir = None
+    if any_patterns:
+        match_any = re.compile('(?:%s)\\Z' % '|'.join(any_patterns)).match
+    if dir_patterns:
+        match_dir = re.compile('(?:%s)\\Z' % '|'.join(dir_patterns)).match
+    root_prefix_len = len(os.path.join(str(root_path), ''))
+    
+    def is_ignored(path: str, is_dir: bool) -> bool:
+        relative_path = path[root_prefix_len:]
+        if os.sep != '/':
+            relative_path = relative_path.replace(os.sep, '/')
+        return bool((match_any is not None and match_any(relative_path)) or
+                    (is_dir and match_dir is not None and match_dir(relative_path)))
+    
+    return is_ignored
 
 
 class DirectoryScanner:
     """Scans a directory and yields items for tree building."""
     
-    def __init__(self, root_path: Path, stop_flag: Callable[[], bool] = None):
+    def __init__(self, root_path: Path, stop_flag: Callable[[], bool] = None,
+                 next_item_id: Optional[Callable[[], int]] = None):
         """
         Args:
             root_path: Root directory to scan.
             stop_flag: Callable that returns True if scanning should be cancelled.
+            next_item_id: Callable returning the next item id. Pass one shared
+                counter so ids stay unique across scans; by default ids are
+                only unique within this scan.
         """
         self.root_path = root_path
         self.stop_flag = stop_flag or (lambda: False)
+        # Item ids are sequential numbers
+        self._next_item_id = next_item_id or itertools.count(1).__next__
+        self.is_ignored = load_ignore_rules(root_path)
+        self.total_folders = 0
+        self.total_files = 0
     
     def scan(self, progress_callback: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
         """
@@ -46,69 +149,80 @@ class DirectoryScanner:
             Dictionary with keys: 'items' (dict), 'total_folders', 'total_files'
         """
         items = {}
-        total_folders = 0
-        total_files = 0
-        
-        # First pass: count items for progress reporting
-        if progress_callback:
-            progress_callback("Counting files and folders...")
-        
-        for root, dirs, files in os.walk(self.root_path):
-            if self.stop_flag():
-                return {'items': {}, 'total_folders': 0, 'total_files': 0, 'cancelled': True}
-            
-            # Filter out hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith(EXCLUDED_PREFIXES)]
-            files = [f for f in files if not f.startswith(EXCLUDED_PREFIXES)]
-            
-            total_folders += len(dirs)
-            total_files += len(files)
+        # Counted while the tree is built, so the folders are walked only once
+        self.total_folders = 0
+        self.total_files = 0
         
         if progress_callback:
-            progress_callback(f"Found {total_folders} folders, {total_files} files. Building tree...")
+            progress_callback("Scanning files and folders...")
         
-        # Build tree structure
         self._build_items(self.root_path, "", items, progress_callback)
         
+        if self.stop_flag():
+            return {'items': {}, 'total_folders': 0, 'total_files': 0, 'cancelled': True}
+        
         return {
             'items': items,
-            'total_folders': total_folders,
-            'total_files': total_files,
+            'total_folders': self.total_folders,
+            'total_files': self.total_files,
             'cancelled': False
         }
     
     def _build_items(self, current_path: Path, parent_id: str, items: Dict, 
                      progress_callback: Optional[Callable[[str], None]] = None):
         """Recursively build items dictionary."""
+        # Bind hot lookups to locals for the per-entry loops
+        stop_flag = self.stop_flag
+        is_ignored = self.is_ignored
+        next_item_id = self._next_item_id
+        localtime = time.localtime
         try:
             # Get all items, filter hidden
             entries = []
-            for entry in current_path.iterdir():
-                if self.stop_flag():
-                    return
-                if entry.name.startswith(EXCLUDED_PREFIXES):
-                    continue
-                entries.append(entry)
+            with os.scandir(current_path) as it:
+                for entry in it:
+                    if stop_flag():
+                        return
+                    if entry.name.startswith(EXCLUDED_PREFIXES) or entry.name in EXCLUDED_NAMES:
+                        continue
+                    if is_ignored is not None and is_ignored(entry.path, entry.is_dir()):
+                        continue
+                    entries.append(entry)
             
-            # Sort: folders first, then by name
+            # Sort: folders first, then by name (DirEntry caches is_dir)
             entries.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
             
+            root_prefix_len = len(os.path.join(str(self.root_path), ''))
             for entry in entries:
-                if self.stop_flag():
+                if stop_flag():
                     return
                 
-                item_id = str(hash(entry))
-                relative_path = entry.relative_to(self.root_path)
-                icon = "📁" if entry.is_dir() else get_file_icon(entry.name)
+                is_dir = entry.is_dir()
+                if is_dir:
+                    self.total_folders += 1
+                else:
+                    self.total_files += 1
+                if progress_callback and (self.total_folders + self.total_files) % 1000 == 0:
+                    progress_callback(
+                        f"Found {self.total_folders} folders, {self.total_files} files...")
+                # Plain strings: slicing off the root prefix is the relative path
+                item_id = str(next_item_id())
+                relative_path = entry.path[root_prefix_len:]
+                icon = "📁" if is_dir else get_file_icon(entry.name)
                 display_text = f"{icon} {entry.name}"
                 
                 size = ""
                 modified = ""
-                if entry.is_file():
+                file_stat = None
+                if not is_dir and entry.is_file():
                     try:
                         stat = entry.stat()
+                        file_stat = (stat.st_size, stat.st_mtime)
                         size = format_size(stat.st_size)
-                        modified = time.strftime("%Y-%m-%d %H:%M", time.localtime(stat.st_mtime))
+                        # Same as strftime("%Y-%m-%d %H:%M") without parsing a format
+                        lt = localtime(stat.st_mtime)
+                        modified = (f"{lt.tm_year:04d}-{lt.tm_mon:02d}-{lt.tm_mday:02d} "
+                                    f"{lt.tm_hour:02d}:{lt.tm_min:02d}")
                     except:
                         size = "N/A"
                         modified = "N/A"
@@ -116,15 +230,16 @@ class DirectoryScanner:
                 items[item_id] = {
                     'parent_id': parent_id,
                     'text': display_text,
-                    'values': (str(relative_path), size, modified),
-                    'is_dir': entry.is_dir(),
-                    'path': entry,
-                    'relative_path': relative_path
+                    'values': (relative_path, size, modified),
+                    'is_dir': is_dir,
+                    'path': entry.path,
+                    'relative_path': relative_path,
+                    'stat': file_stat  # (size, mtime), reused when compiling
                 }
                 
                 # Recursively add subdirectories
-                if entry.is_dir():
-                    self._build_items(entry, item_id, items, progress_callback)
+                if is_dir:
+                    self._build_items(entry.path, item_id, items, progress_callback)
                     
         except Exception as e:
             if progress_callback:
@@ -50,6 +50,7 @@ class MainWindow:
         self.status_label = None
         self.file_count_label = None
         self.right_status_container = None
+        self._resize_after_id = None
         
         # Window close protocol
         self.root.protocol("WM_DELETE_WINDOW", self.controller.on_closing)
@@ -280,6 +281,15 @@ class MainWindow:
         self.root.bind('<Configure>', self._on_window_resize)
     
     def _on_window_resize(self, event):
+        # Only react to the window itself, once the drag has settled
+        if event.widget is not self.root:
+            return
+        if self._resize_after_id:
+            self.root.after_cancel(self._resize_after_id)
+        self._resize_after_id = self.root.after(50, self._apply_resize)
+    
+    def _apply_resize(self):
+        self._resize_after_id = None
         if hasattr(self, 'tree') and self.tree.winfo_width() > 100:
             width = self.tree.winfo_width()
             self.tree.column("#0", width=int(width * 0.4))
@@ -327,8 +337,17 @@ class MainWindow:
             self.progress_frame.grid_remove()
     
     def clear_tree(self):
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self.tree.clear()
+    
+    def begin_tree_update(self):
+        """Unmap the tree and hide its detail columns so bulk inserts skip redraws."""
+        self.tree.grid_remove()
+        self.tree.configure(displaycolumns=())
+    
+    def end_tree_update(self):
+        """Restore the detail columns and map the tree again after a bulk insert."""
+        self.tree.configure(displaycolumns="#all")
+        self.tree.grid()
     
     def add_tree_item(self, item_id: str, parent_id: str, text: str, values: tuple, tags: tuple):
         self.tree.insert(parent_id, "end", iid=item_id, text=text, values=values, tags=tags)
@@ -337,22 +356,10 @@ class MainWindow:
         return self.tree.get_checked_items()
     
     def check_all(self):
-        for item in self.tree.get_children():
-            self._check_recursive(item)
-    
-    def _check_recursive(self, item_id):
-        self.tree.item(item_id, tags=("checked",))
-        for child in self.tree.get_children(item_id):
-            self._check_recursive(child)
+        self.tree.check_all()
     
     def uncheck_all(self):
-        for item in self.tree.get_children():
-            self._uncheck_recursive(item)
-    
-    def _uncheck_recursive(self, item_id):
-        self.tree.item(item_id, tags=("unchecked",))
-        for child in self.tree.get_children(item_id):
-            self._uncheck_recursive(child)
+        self.tree.uncheck_all()
     
     def get_output_settings(self):
         return self.output_dir_var.get().strip(), self.output_file_var.get().strip()
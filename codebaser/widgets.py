@@ -5,9 +5,49 @@ from tkinter import ttk
 
 class CheckboxTreeview(ttk.Treeview):
     """Custom Treeview with checkboxes."""
+
+    # Icons as (color, (x1, y1, x2, y2)) rectangle fills painted in order;
+    # Tk treats x2/y2 as exclusive and leaves unpainted pixels transparent
+    _CHECKED_RECTS = (
+        ("#8BAE66", (2, 2, 16, 16)),   # Background
+        ("#EBD5AB", (2, 2, 4, 4)),     # Rounded corners, match background
+        ("#EBD5AB", (14, 2, 16, 4)),
+        ("#EBD5AB", (2, 14, 4, 16)),
+        ("#EBD5AB", (14, 14, 16, 16)),
+        ("#1B211A", (4, 8, 8, 12)),    # Check mark
+        ("#1B211A", (7, 4, 13, 12)),
+        ("#1B211A", (12, 4, 14, 6)),
+        ("#1B211A", (7, 5, 14, 14)),
+        ("#1B211A", (3, 9, 8, 14)),
+    )
+    _UNCHECKED_RECTS = (
+        ("#628141", (2, 2, 16, 16)),   # Border
+        ("#EBD5AB", (3, 3, 15, 15)),   # Interior
+    )
+    _MIXED_RECTS = (
+        ("#8BAE66", (2, 2, 16, 16)),   # Border
+        ("#EBD5AB", (3, 3, 15, 15)),   # Interior
+        ("#1B211A", (5, 8, 13, 10)),   # Horizontal bar
+    )
+
+    # (checked, unchecked, mixed) icons shared by every tree, and the Tk
+    # interpreter they were created in
+    _icons = None
+    _icons_tk = None
+
     def __init__(self, master=None, **kw):
         super().__init__(master, **kw)
 
+        # Check state per item, mirrored here so reads avoid Tcl round-trips
+        self._tag_state = {}
+        # Checked items, plus a sort key per item to report them in tree order
+        self._checked_set = set()
+        self._insert_order = {}
+        self._child_counts = {}
+        # Tree structure, mirrored so walks need no get_children()/parent() calls
+        self._children = {}
+        self._parents = {}
+
         # Create checkbox images
         self._create_checkbox_images()
 
@@ -21,124 +61,207 @@ class CheckboxTreeview(ttk.Treeview):
         self.bind("<Double-1>", self._handle_double_click)
 
     def _create_checkbox_images(self):
-        """Create checkbox images using canvas."""
-        # Create checked icon with custom color
-        self.checked_icon = tk.PhotoImage(width=18, height=18)
-        # Draw rounded rectangle background
-        for x in range(18):
-            for y in range(18):
-                if 2 <= x <= 15 and 2 <= y <= 15:
-                    # Create rounded effect
-                    if (x < 4 or x > 13) and (y < 4 or y > 13):
-                        self.checked_icon.put("#EBD5AB", (x, y))  # Match background
-                    else:
-                        self.checked_icon.put("#8BAE66", (x, y))
-        
-        # Draw check mark
-        check_points = [(4, 8), (7, 11), (12, 4), (13, 5), (7, 13), (3, 9)]
-        for i in range(len(check_points)-1):
-            x1, y1 = check_points[i]
-            x2, y2 = check_points[i+1]
-            for x in range(min(x1, x2), max(x1, x2)+1):
-                for y in range(min(y1, y2), max(y1, y2)+1):
-                    self.checked_icon.put("#1B211A", (x, y))
-
-        # Create unchecked icon
-        self.unchecked_icon = tk.PhotoImage(width=18, height=18)
-        # Draw border
-        for x in range(18):
-            for y in range(18):
-                if 2 <= x <= 15 and 2 <= y <= 15:
-                    if x == 2 or x == 15 or y == 2 or y == 15:
-                        self.unchecked_icon.put("#628141", (x, y))
-                    else:
-                        self.unchecked_icon.put("#EBD5AB", (x, y))
-
-        # Create mixed state icon
-        self.mixed_icon = tk.PhotoImage(width=18, height=18)
-        # Draw border
-        for x in range(18):
-            for y in range(18):
-                if 2 <= x <= 15 and 2 <= y <= 15:
-                    if x == 2 or x == 15 or y == 2 or y == 15:
-                        self.mixed_icon.put("#8BAE66", (x, y))
-                    else:
-                        self.mixed_icon.put("#EBD5AB", (x, y))
-        
-        # Draw horizontal line
-        for x in range(5, 13):
-            self.mixed_icon.put("#1B211A", (x, 8))
-            self.mixed_icon.put("#1B211A", (x, 9))
+        """Create checkbox images from a few rectangle fills each.
+
+        They are built by the first tree and reused by later ones, as long
+        as those belong to the same Tk interpreter.
+        """
+        cls = CheckboxTreeview
+        if cls._icons_tk is not self.tk:
+            cls._icons = (self._paint_icon(self, self._CHECKED_RECTS),
+                          self._paint_icon(self, self._UNCHECKED_RECTS),
+                          self._paint_icon(self, self._MIXED_RECTS))
+            cls._icons_tk = self.tk
+        self.checked_icon, self.unchecked_icon, self.mixed_icon = cls._icons
+
+    @staticmethod
+    def _paint_icon(master, rects):
+        """Paint an 18x18 icon with one PhotoImage.put call per rectangle."""
+        icon = tk.PhotoImage(master=master, width=18, height=18)
+        for color, rect in rects:
+            icon.put(color, to=rect)
+        return icon
+
+    def _clicked_tree_item(self, event):
+        """Return the item under a click in the tree column, or ""."""
+        # Row first: clicks on headings or empty space stop after one call
+        item = self.identify_row(event.y)
+        if item and self.identify_column(event.x) == "#0":
+            return item
+        return ""
 
     def _handle_click(self, event):
         """Handle single click to toggle checkbox."""
-        region = self.identify("region", event.x, event.y)
-        if region == "tree":
-            item = self.identify("item", event.x, event.y)
-            if item:
-                self.toggle_check(item)
+        item = self._clicked_tree_item(event)
+        if item:
+            self.toggle_check(item)
 
     def _handle_double_click(self, event):
         """Handle double click to expand/collapse folders."""
-        region = self.identify("region", event.x, event.y)
-        if region == "tree":
-            item = self.identify("item", event.x, event.y)
-            if item and self.item(item, "open"):
-                self.item(item, open=False)
-            elif item:
-                self.item(item, open=True)
+        item = self._clicked_tree_item(event)
+        if item and self.item(item, "open"):
+            self.item(item, open=False)
+        elif item:
+            self.item(item, open=True)
+
+    def insert(self, parent, index, iid=None, **kw):
+        """Insert an item and record its initial check state."""
+        item = super().insert(parent, index, iid=iid, **kw)
+        # The parent's key plus the child's position sorts in display order
+        # even when a folder's children are inserted after its siblings
+        position = self._child_counts.get(parent, 0)
+        self._child_counts[parent] = position + 1
+        self._insert_order[item] = self._insert_order.get(parent, ()) + (position,)
+        siblings = self._children.setdefault(parent, [])
+        if index == "end":
+            siblings.append(item)
+        else:
+            siblings.insert(int(index), item)
+        self._parents[item] = parent
+        tags = kw.get("tags", ())
+        if isinstance(tags, str):
+            tags = (tags,)
+        for state in ("checked", "unchecked", "mixed"):
+            if state in tags:
+                self._tag_state[item] = state
+                if state == "checked":
+                    self._checked_set.add(item)
+                break
+        return item
+
+    def delete(self, *items):
+        """Delete items and forget the check state of their subtrees."""
+        children = self._children
+        parents = self._parents
+        for item in items:
+            siblings = children.get(parents.get(item))
+            if siblings and item in siblings:
+                siblings.remove(item)
+        stack = list(items)
+        while stack:
+            item = stack.pop()
+            self._tag_state.pop(item, None)
+            self._checked_set.discard(item)
+            self._insert_order.pop(item, None)
+            self._child_counts.pop(item, None)
+            parents.pop(item, None)
+            stack.extend(children.pop(item, ()))
+        super().delete(*items)
+
+    def clear(self):
+        """Delete every item in the tree."""
+        super().delete(*self._children.get("", ()))
+        self._tag_state.clear()
+        self._checked_set.clear()
+        self._insert_order.clear()
+        self._child_counts.clear()
+        self._children.clear()
+        self._parents.clear()
+
+    def get_check_state(self, item):
+        """Return "checked", "unchecked" or "mixed" for an item."""
+        return self._tag_state.get(item)
+
+    def _set_check_state(self, item, state):
+        """Set an item's check state in both the tree and the cache."""
+        # Swap only the check tag, so row and file/folder tags stay put
+        old_state = self._tag_state.get(item)
+        if old_state:
+            self.tk.call(self._w, "tag", "remove", old_state, (item,))
+        self.tk.call(self._w, "tag", "add", state, (item,))
+        self._tag_state[item] = state
+        if state == "checked":
+            self._checked_set.add(item)
+        else:
+            self._checked_set.discard(item)
 
     def toggle_check(self, item):
         """Toggle checkbox state for an item."""
-        current_tags = self.item(item, "tags")
-        if "checked" in current_tags:
-            self.item(item, tags=("unchecked",))
+        if self._tag_state.get(item) == "checked":
+            self._set_check_state(item, "unchecked")
             self._propagate_check_state(item, False)
         else:
-            self.item(item, tags=("checked",))
+            self._set_check_state(item, "checked")
             self._propagate_check_state(item, True)
 
     def _propagate_check_state(self, item, checked):
         """Propagate check state to children and update parent state."""
-        # Update children
-        children = self.get_children(item)
-        for child in children:
-            self.item(child, tags=("checked",) if checked else ("unchecked",))
-            self._propagate_check_state(child, checked)
+        # Update descendants with an explicit stack rather than recursion
+        children = self._children
+        descendants = []
+        stack = list(children.get(item, ()))
+        while stack:
+            child = stack.pop()
+            descendants.append(child)
+            stack.extend(children.get(child, ()))
+        self._set_check_states(descendants, "checked" if checked else "unchecked")
 
         # Update parent if needed
-        parent = self.parent(item)
-        if parent and parent != "":
+        parent = self._parents.get(item)
+        if parent:
             self._update_parent_check_state(parent)
 
     def _update_parent_check_state(self, parent):
-        """Update parent checkbox based on children states."""
-        children = self.get_children(parent)
-        if not children:
-            return
+        """Update parent checkboxes from their children, walking up while they change."""
+        while parent:
+            children = self._children.get(parent)
+            if not children:
+                return
 
-        all_checked = all("checked" in self.item(child, "tags") for child in children)
-        any_checked = any("checked" in self.item(child, "tags") for child in children)
-        all_unchecked = all("unchecked" in self.item(child, "tags") for child in children)
+            # Count child states in one pass, stopping as soon as the result is mixed
+            n_checked = n_unchecked = 0
+            for child in children:
+                state = self._tag_state.get(child)
+                if state == "checked":
+                    n_checked += 1
+                elif state == "unchecked":
+                    n_unchecked += 1
+                else:
+                    break
+                if n_checked and n_unchecked:
+                    break
 
-        if all_checked:
-            self.item(parent, tags=("checked",))
-        elif all_unchecked:
-            self.item(parent, tags=("unchecked",))
-        else:
-            self.item(parent, tags=("mixed",))
+            if n_checked == len(children):
+                new_state = "checked"
+            elif n_unchecked == len(children):
+                new_state = "unchecked"
+            else:
+                new_state = "mixed"
+
+            # An unchanged parent leaves every ancestor above it unchanged too
+            if self._tag_state.get(parent) == new_state:
+                return
+            self._set_check_state(parent, new_state)
+            parent = self._parents.get(parent)
 
     def get_checked_items(self):
-        """Get all checked items."""
-        checked_items = []
+        """Get all checked items in tree order."""
+        # Sorting by display key avoids walking the tree
+        return sorted(self._checked_set, key=self._insert_order.__getitem__)
 
-        def traverse(item):
-            if "checked" in self.item(item, "tags"):
-                checked_items.append(item)
-            for child in self.get_children(item):
-                traverse(child)
+    def check_all(self):
+        """Check every item in the tree."""
+        self._set_check_states(tuple(self._tag_state), "checked")
 
-        for child in self.get_children():
-            traverse(child)
+    def uncheck_all(self):
+        """Uncheck every item in the tree."""
+        self._set_check_states(tuple(self._tag_state), "unchecked")
 
-        return checked_items
\ No newline at end of file
+    def _set_check_states(self, items, state):
+        """Give several items the same check state, with one Tcl call per tag."""
+        # Items already in that state need no retagging
+        tag_state = self._tag_state
+        items = [item for item in items if tag_state.get(item) != state]
+        if not items:
+            return
+        # "tag remove"/"tag add" take the whole item list at once
+        call = self.tk.call
+        for other in ("checked", "unchecked", "mixed"):
+            if other != state:
+                call(self._w, "tag", "remove", other, items)
+        call(self._w, "tag", "add", state, items)
+        tag_state.update(dict.fromkeys(items, state))
+        if state == "checked":
+            self._checked_set.update(items)
+        else:
+            self._checked_set.difference_update(items)
\ No newline at end of file